@@ -1,37 +1,111 @@
-
 from lcd import LCD_1inch3, WHITE, BLACK
 import vga2_8x16 as font
 import system_state
 
 lcd = LCD_1inch3()
 
+LINE_PITCH = font.HEIGHT + 2
+PAUSED_BG = 0x8CBD  # Light blue background to indicate paused screen
+BAND_MERGE = 8      # send two dirty bands as one if fewer rows than this lie between
+
+# Static labels: (text, x, y). Drawn on a full redraw, and again only if a
+# changed text line overlaps one
+BUTTON_LABELS = (
+    # Row just above bottom
+    ("screen", 30, 200),
+    ("logging", 150, 200),
+    # Bottom row
+    ("start", 10, 220),
+    ("stop", 70, 220),
+    ("start", 130, 220),
+    ("stop", 190, 220),
+)
+
+# What is on the panel now: background, and the version of each line drawn
+# (system_state.display_versions) and of the whole set
+_bg = None
+_shown = []
+_shown_version = -1
+
+stats = system_state.display_stats
+
+
 def update_display():
-    lcd.fill(WHITE)
-    y = 0
-    for line in system_state.display_lines:
-        lcd.draw_text(font, line, 5, y, BLACK)
-        y += font.HEIGHT + 2
-    draw_button_labels()
-    lcd.show()
+    _render(WHITE)
+
 
 def force_display():
-    lcd.fill(0x8CBD)  # Light blue background to indicate paused screen
-    y = 0
-    for line in system_state.display_lines:
-        lcd.draw_text(font, line, 5, y, BLACK)
-        y += font.HEIGHT + 2
-    draw_button_labels()
-    lcd.show()
+    _render(PAUSED_BG)
+
+
+def invalidate():
+    """Redraw the whole screen on the next update."""
+    global _bg
+    _bg = None
+
 
 def draw_button_labels():
-    # Row just above bottom
-    lcd.draw_text(font, "screen", 30, 200, BLACK)
-    lcd.draw_text(font, "logging", 150, 200, BLACK)
+    for text, x, y in BUTTON_LABELS:
+        lcd.draw_text(font, text, x, y, BLACK)
 
-    # Bottom row
-    lcd.draw_text(font, "start", 10, 220, BLACK)
-    lcd.draw_text(font, "stop", 70, 220, BLACK)
-    lcd.draw_text(font, "start", 130, 220, BLACK)
-    lcd.draw_text(font, "stop", 190, 220, BLACK)
 
+def _render(bg):
+    global _bg, _shown, _shown_version
+    lines = system_state.display_lines
+    versions = system_state.display_versions
+    if bg == _bg and system_state.display_version == _shown_version:
+        stats["skipped"] += 1
+        return
+    # The last flush may still be going out by DMA: don't draw under it
+    if lcd.busy():
+        stats["flush_waits"] += 1
+        lcd.wait()
+    if bg != _bg or len(lines) != len(_shown):
+        lcd.fill(bg)
+        y = 0
+        for line in lines:
+            lcd.draw_text(font, line, 5, y, BLACK)
+            y += LINE_PITCH
+        draw_button_labels()
+        _bg = bg
+        _shown = list(versions)
+        _shown_version = system_state.display_version
+        stats["full"] += 1
+        stats["frames"] += 1
+        stats["bytes"] += lcd.show()
+        return
+
+    # Redraw only the lines whose version moved, as (first row, end row) bands
+    _shown_version = system_state.display_version
+    bands = []
+    y = 0
+    for i, v in enumerate(versions):
+        if v != _shown[i]:
+            lcd.fill_rect(0, y, lcd.width, font.HEIGHT, bg)
+            lcd.draw_text(font, lines[i], 5, y, BLACK)
+            _shown[i] = v
+            bands.append((y, y + font.HEIGHT))
+        y += LINE_PITCH
+    if not bands:
+        stats["skipped"] += 1
+        return
+
+    for text, x, ly in BUTTON_LABELS:
+        for y0, y1 in bands:
+            if y0 < ly + font.HEIGHT and ly < y1:
+                lcd.draw_text(font, text, x, ly, BLACK)
+                bands.append((ly, ly + font.HEIGHT))
+                break
 
+    bands.sort()
+    sent = 0
+    start, end = bands[0]
+    for y0, y1 in bands[1:]:
+        if y0 - end < BAND_MERGE:
+            end = max(end, y1)
+        else:
+            sent += lcd.show_rows(start, end)
+            start, end = y0, y1
+    sent += lcd.show_rows(start, end)
+    stats["frames"] += 1
+    stats["bytes"] += sent
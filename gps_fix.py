@@ -0,0 +1,96 @@
+# gps_fix.py
+# Latest GNSS solution as plain numbers. Text for the LCD / web page is only
+# formatted when something actually renders it.
+
+FIX_NAMES = {
+    0: "None",
+    1: "GPS",
+    2: "DGPS",
+    4: "RTK Fixed",
+    5: "RTK Float"
+}
+
+
+class GpsFix:
+    __slots__ = ("lat", "lon", "heading", "quality", "utc", "version", "nav_seq", "last_update_ticks",
+                 "speed", "course", "pdop", "hdop", "vdop", "lat_err", "lon_err", "alt_err", "gst_age")
+
+    def __init__(self):
+        self.lat = None            # decimal degrees
+        self.lon = None
+        self.heading = None        # degrees true (VTG)
+        self.quality = -1          # GGA fix quality, -1 = not seen yet
+        self.utc = -1              # seconds of day, -1 = unknown
+        self.version = 0           # bumped on every update
+        self.nav_seq = 0           # bumped on position/course updates only (GGA, VTG, RMC)
+        self.last_update_ticks = None  # ticks_ms() of the last GGA
+        self.speed = None          # m/s over ground (RMC)
+        self.course = None         # degrees true (RMC)
+        self.pdop = None           # dilution of precision (GSA)
+        self.hdop = None
+        self.vdop = None
+        self.lat_err = None        # 1-sigma position error in metres (GST)
+        self.lon_err = None
+        self.alt_err = None
+        self.gst_age = 0           # GGA fixes since the last GST
+
+    def copy_from(self, other):
+        self.lat = other.lat
+        self.lon = other.lon
+        self.heading = other.heading
+        self.quality = other.quality
+        self.utc = other.utc
+        self.version = other.version
+        self.nav_seq = other.nav_seq
+        self.last_update_ticks = other.last_update_ticks
+        self.speed = other.speed
+        self.course = other.course
+        self.pdop = other.pdop
+        self.hdop = other.hdop
+        self.vdop = other.vdop
+        self.lat_err = other.lat_err
+        self.lon_err = other.lon_err
+        self.alt_err = other.alt_err
+        self.gst_age = other.gst_age
+
+    def has_position(self):
+        return self.lat is not None and self.lon is not None
+
+    def h_err(self):
+        """Horizontal 1-sigma error in metres from GST, or None."""
+        if self.lat_err is None or self.lon_err is None:
+            return None
+        return (self.lat_err * self.lat_err + self.lon_err * self.lon_err) ** 0.5
+
+    def hhmmss(self):
+        """UTC as 'hhmmss', or '' if unknown."""
+        t = self.utc
+        if t < 0:
+            return ""
+        return "{:02d}{:02d}{:02d}".format(t // 3600, t // 60 % 60, t % 60)
+
+    # --- display text, formatted on demand ---
+    def time_text(self):
+        t = self.utc
+        if t < 0:
+            return ""
+        return "{:02d}:{:02d}:{:02d} UTC".format(t // 3600, t // 60 % 60, t % 60)
+
+    def lat_text(self):
+        return "" if self.lat is None else "Lat: {:.6f}".format(self.lat)
+
+    def lon_text(self):
+        return "" if self.lon is None else "Lon: {:.6f}".format(self.lon)
+
+    def heading_text(self):
+        return "" if self.heading is None else f"Head: {self.heading:.2f}°"
+
+    def fix_name(self):
+        q = self.quality
+        if q < 0:
+            return ""
+        return FIX_NAMES.get(q) or str(q)
+
+    def fix_text(self):
+        name = self.fix_name()
+        return f"Fix: {name}" if name else ""
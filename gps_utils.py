@@ -1,118 +1,209 @@
 from machine import UART
-import sys
 import time
 import math
+try:
+    import ujson as json
+except ImportError:
+    import json
+import nmea_utils
+import env_utils
+from ring_buffer import ByteRing
+from track_store import TrackStore
+from nmea_utils import tokenize, checksum_ok, find_start, key_at, sentence_key, dec_int, dec_float, dec_coord, dec_hhmmss
 
 
-MAX_POINTS = 60 
-_track = []                
+_env = env_utils.load_env()
+# Breadcrumb capacity, 12 bytes per point (see track_store). When full the
+# track is thinned rather than dropping its start, unless TRACK_SIMPLIFY=0.
+MAX_POINTS = int(_env.get("TRACK_POINTS", "1000"))
+MIN_SPACING_M = float(_env.get("TRACK_MIN_SPACING", "0.5"))  # metres between stored points
+_track = TrackStore(MAX_POINTS, _env.get("TRACK_SIMPLIFY", "1") != "0")
 DEGREE_SYMBOL = chr(248)
 
-gps_uart = UART(1, baudrate=115200)
-gps_uart_buffer = b""  # persistent buffer
+GPS_RING_SIZE = 2048
+GPS_RXBUF = 4096  # driver-side buffer, filled from the UART interrupt in C
+GPS_LINES_PER_POLL = 8
 
-def parse_lat_lon(nmea):
-    try:
-        parts = nmea.split(',')
-        lat = float(parts[2])
-        lat_dir = parts[3]
-        lon = float(parts[4])
-        lon_dir = parts[5]
-
-        lat_deg = int(lat / 100)
-        lat_min = lat - lat_deg * 100
-        latitude = lat_deg + lat_min / 60
-        if lat_dir == 'S':
-            latitude = -latitude
-
-        lon_deg = int(lon / 100)
-        lon_min = lon - lon_deg * 100
-        longitude = lon_deg + lon_min / 60
-        if lon_dir == 'W':
-            longitude = -longitude
-
-        return latitude, longitude
-    except (IndexError, ValueError):
-        return None, None
-
-def extract_position(nmea):
-    if nmea.startswith('$GNGGA'):
-        lat, lon = parse_lat_lon(nmea)
-        if lat and lon:
-            return "Lat: {:.6f}".format(lat), "Lon: {:.6f}".format(lon)
-    return None, None
-
-def parse_fix_quality(nmea):
-    try:
-        fix = int(nmea.split(',')[6])
-        return {
-            0: "Fix: None",
-            1: "Fix: GPS",
-            2: "Fix: DGPS",
-            4: "Fix: RTK Fixed",
-            5: "Fix: RTK Float"
-        }.get(fix, f"Fix: {fix}")
-    except:
-        return "Fix: Unknown"
-
-def parse_heading(nmea):
-    try:
-        heading = float(nmea.split(',')[1])
-        return f"Head: {heading:.2f}°"   # use a proper Unicode degree
-    except:
-        return None
+try:
+    gps_uart = UART(1, baudrate=115200, rxbuf=GPS_RXBUF)
+except (TypeError, ValueError):
+    gps_uart = UART(1, baudrate=115200)
+    GPS_RXBUF = 0
+gps_ring = ByteRing(GPS_RING_SIZE)
+ingest_irq = False   # True once start_ingest() has hooked the RX interrupt
+rxbuf_full = 0       # times the driver buffer was found full (bytes lost)
+
+_offs = nmea_utils.new_offsets()
+KNOTS_TO_MS = 0.514444
+GST_MAX_AGE = 10  # GGA fixes without a GST before its error estimate is dropped
+
+def _on_gga(buf, offs, n, fix):
+    if n < 8:
+        return False
+    lat = dec_coord(buf, offs[2], offs[3] - 1, offs[3], offs[4] - 1)
+    lon = dec_coord(buf, offs[4], offs[5] - 1, offs[5], offs[6] - 1)
+    if lat and lon:
+        fix.lat = lat
+        fix.lon = lon
+    fix.utc = dec_hhmmss(buf, offs[1], offs[2] - 1)
+    fix.quality = dec_int(buf, offs[6], offs[7] - 1, -1)
+    fix.last_update_ticks = time.ticks_ms()
+    fix.nav_seq += 1
+    # An error estimate that stopped arriving no longer describes this fix
+    fix.gst_age += 1
+    if fix.gst_age > GST_MAX_AGE:
+        fix.lat_err = None
+        fix.lon_err = None
+        fix.alt_err = None
+    return True
+
+def _on_vtg(buf, offs, n, fix):
+    if n < 3:
+        return False
+    heading = dec_float(buf, offs[1], offs[2] - 1)
+    if heading is None:
+        return False
+    fix.heading = heading
+    fix.nav_seq += 1
+    return True
+
+def _on_rmc(buf, offs, n, fix):
+    if n < 10:
+        return False
+    if buf[offs[2]] != 65:  # status 'A' = valid
+        return False
+    speed = dec_float(buf, offs[7], offs[8] - 1)
+    if speed is not None:
+        fix.speed = speed * KNOTS_TO_MS
+    course = dec_float(buf, offs[8], offs[9] - 1)
+    if course is not None:
+        fix.course = course
+    fix.nav_seq += 1
+    return True
+
+def _on_gsa(buf, offs, n, fix):
+    if n < 18:
+        return False
+    fix.pdop = dec_float(buf, offs[15], offs[16] - 1)
+    fix.hdop = dec_float(buf, offs[16], offs[17] - 1)
+    fix.vdop = dec_float(buf, offs[17], offs[18] - 1)
+    return True
+
+def _on_gst(buf, offs, n, fix):
+    if n < 9:
+        return False
+    fix.lat_err = dec_float(buf, offs[6], offs[7] - 1)
+    fix.lon_err = dec_float(buf, offs[7], offs[8] - 1)
+    fix.alt_err = dec_float(buf, offs[8], offs[9] - 1)
+    fix.gst_age = 0
+    return True
+
+# talker+sentence ID -> handler. LC29H reports the combined solution as GN;
+# GSA comes once per constellation.
+_HANDLERS = {}
+sentence_stats = {}   # "GNGGA" -> [received, bad checksum, dropped]
+_stats = {}           # sentence_key -> the same lists
+_other = [0, 0, 0]    # sentences with no handler
+sentence_stats["other"] = _other
+bytes_dropped = 0     # bytes in lines that failed the checksum or had no '$'
+
+def _register(names, handler):
+    for name in names:
+        key = sentence_key(name)
+        _HANDLERS[key] = handler
+        counts = [0, 0, 0]
+        sentence_stats[name.decode()] = counts
+        _stats[key] = counts
+
+_register((b"GNGGA", b"GPGGA"), _on_gga)
+_register((b"GNVTG", b"GPVTG"), _on_vtg)
+_register((b"GNRMC", b"GPRMC"), _on_rmc)
+_register((b"GNGSA", b"GPGSA", b"GLGSA", b"GAGSA", b"GBGSA", b"GQGSA"), _on_gsa)
+_register((b"GNGST", b"GPGST"), _on_gst)
+
+def parse_sentence(buf, start, end, fix):
+    """
+    Checksum and dispatch the sentence in buf[start:end] (bytes or
+    bytearray), decoding straight from the raw bytes into the GpsFix fix.
+    """
+    global bytes_dropped
+    s = find_start(buf, start, end)
+    if s < 0:
+        bytes_dropped += end - start
+        return
+    offs = _offs
+    n = tokenize(buf, s, end, offs)
+    key = key_at(buf, s)
+    counts = _stats.get(key, _other)
+    counts[0] += 1
+    if not checksum_ok(buf, s, end, offs, n):
+        counts[1] += 1
+        bytes_dropped += end - start
+        return
+    handler = _HANDLERS.get(key)
+    if handler is None or not handler(buf, offs, n, fix):
+        counts[2] += 1
+        return
+    fix.version += 1
 
-def parse_time(nmea):
+def process_buffer(buffer, fix):
+    """Parse every complete line in a bytes chunk into fix."""
+    start = 0
+    end = len(buffer)
+    while start < end:
+        nl = buffer.find(b'\n', start, end)
+        if nl < 0:
+            nl = end
+        parse_sentence(buffer, start, nl, fix)
+        start = nl + 1
+
+def _check_rxbuf(uart):
+    global rxbuf_full
+    if GPS_RXBUF and uart.any() >= GPS_RXBUF - 1:
+        rxbuf_full += 1
+
+def _on_uart_rx(uart):
+    # Soft IRQ: runs as soon as the VM is free, even mid main-loop stage
+    _check_rxbuf(uart)
+    gps_ring.fill_from(uart)
+
+def start_ingest():
+    """
+    Move UART bytes into gps_ring from the RX-idle interrupt rather than from
+    read_and_parse(). Call after any direct gps_uart reads (disable_pps).
+    Returns False and keeps polling if the port has no UART.IRQ_RXIDLE.
+
+    Single-core loops only: on rp2 the soft IRQ runs on the main thread
+    (core 0), so with parsing on core 1 keep polling from read_and_parse().
+    """
+    global ingest_irq
+    trigger = getattr(UART, "IRQ_RXIDLE", None)
+    if trigger is None:
+        print("UART RX irq not supported; polling GPS from the main loop")
+        return False
     try:
-        raw_time = nmea.split(',')[1]
-        if len(raw_time) >= 6:
-            return f"{raw_time[0:2]}:{raw_time[2:4]}:{raw_time[4:6]} UTC"
-    except:
-        pass
-    return None
+        gps_uart.irq(_on_uart_rx, trigger)
+    except Exception as e:
+        print("UART irq setup failed:", e)
+        return False
+    ingest_irq = True
+    return True
 
-def process_buffer(buffer, latest):
+def read_and_parse(fix, max_lines=GPS_LINES_PER_POLL):
+    """Parse at most max_lines buffered sentences into fix."""
     try:
-        decoded = buffer.decode('ascii', 'ignore')
-        for sentence in decoded.replace('\n', '').split('$'):
-            if not sentence:
-                continue
-            nmea = '$' + sentence.strip()
-            if nmea.startswith('$GNGGA'):
-                lat_str, lon_str = extract_position(nmea)
-                if lat_str and lon_str:
-                    latest['lat'] = lat_str
-                    latest['lon'] = lon_str
-                    lat_f, lon_f = parse_lat_lon(nmea)
-                    if lat_f is not None and lon_f is not None:
-                        add_fix(lat_f, lon_f)  # ts auto-filled
-                latest['time'] = parse_time(nmea)
-                latest['fix'] = parse_fix_quality(nmea)
-                latest['last_update_ticks'] = time.ticks_ms()
-            elif nmea.startswith('$GNVTG'):
-                heading_str = parse_heading(nmea)
-                if heading_str:
-                    latest['heading'] = heading_str
+        if ingest_irq:
+            gps_ring.drain_lines(parse_sentence, fix, max_lines)
+            return
+        # Two rounds so a ring that filled up mid-read is topped up again
+        for _ in range(2):
+            _check_rxbuf(gps_uart)
+            got = gps_ring.fill_from(gps_uart)
+            gps_ring.drain_lines(parse_sentence, fix, max_lines)
+            if not got:
+                break
     except Exception as e:
-        sys.print_exception(e)
-        print("Buffer processing error:", repr(e))
-        print("buffer: {buffer}")
-        print("decoded: {decoded}")
-
-def read_and_parse(latest):
-    global gps_uart_buffer
-    if gps_uart.any():
-        try:
-            gps_uart_buffer += gps_uart.read(gps_uart.any())
-            if b'\n' in gps_uart_buffer:
-                chunks = gps_uart_buffer.split(b'\n')
-                for chunk in chunks[:-1]:
-                    process_buffer(chunk + b'\n', latest)
-                gps_uart_buffer = chunks[-1]  # retain incomplete part
-        except Exception as e:
-            print("UART read exception:", e)
-            
-            
+        print("UART read exception:", e)
 
 def haversine_distance(lat1, lon1, lat2, lon2):
     R = 6371000  # Radius of Earth in meters
@@ -233,20 +324,70 @@ def disable_pps():
 
 
 def add_fix(lat, lon, ts=None):
-    global _track
-    _track.append({"lat": lat, "lon": lon, "t": ts or int(time.time())})  # <-- time.time()
-    if len(_track) > MAX_POINTS:
-        _track = _track[-MAX_POINTS:]
+    # Distance gate: a parked rover should not fill the track
+    last = _track.last()
+    if last is not None and approx_distance(last[0], last[1], lat, lon) < MIN_SPACING_M:
+        return
+    _track.append(lat, lon, ts or int(time.time()))
+
+_track_ticks = None
+
+def track_update(fix):
+    """Add fix to the track if it carries a position from a new GGA."""
+    global _track_ticks
+    if fix.last_update_ticks != _track_ticks and fix.has_position():
+        _track_ticks = fix.last_update_ticks
+        add_fix(fix.lat, fix.lon)
 
 def current_fix():
-    """Return the latest fix or None."""
-    return _track[-1] if _track else None
+    """Return the latest fix as {"lat", "lon", "t"} or None."""
+    p = _track.last()
+    if p is None:
+        return None
+    return {"lat": p[0], "lon": p[1], "t": p[2]}
+
+_track_json_key = None
+_track_json_body = b""
+
+def track_json(since=0, gen=-1):
+    """
+    /track.json body as bytes. since=0, a cursor older than the oldest
+    stored point or a stale gen (the track was simplified) returns the whole
+    track, cached until the track changes; otherwise just the points
+    appended after cursor since. "seq" and "gen" are the cursor for the next
+    request; "since" is 0 when the client must replace rather than append.
+    """
+    global _track_json_key, _track_json_body
+    seq = _track.seq
+    g = _track.generation
+    if since > seq or gen != g:
+        since = 0
+    if since and since >= _track.first_seq():
+        coords = json.dumps(_track.coords(since - _track.first_seq()))
+        return ('{"type":"FeatureCollection","seq":%d,"gen":%d,"since":%d,"features":['
+                '{"type":"Feature","properties":{"kind":"track"},'
+                '"geometry":{"type":"LineString","coordinates":%s}}]}'
+                % (seq, g, since, coords)).encode()
+    key = (seq, g)
+    if key != _track_json_key:
+        features = ""
+        if len(_track):
+            coords = json.dumps(_track.coords())  # encoded once, used twice
+            features = ('{"type":"Feature","properties":{"kind":"points"},'
+                        '"geometry":{"type":"MultiPoint","coordinates":%s}},'
+                        '{"type":"Feature","properties":{"kind":"track"},'
+                        '"geometry":{"type":"LineString","coordinates":%s}}'
+                        % (coords, coords))
+        _track_json_body = ('{"type":"FeatureCollection","seq":%d,"gen":%d,"since":0,"features":[%s]}'
+                            % (seq, g, features)).encode()
+        _track_json_key = key
+    return _track_json_body
 
 def as_geojson():
     """Return a tiny GeoJSON payload: points + line."""
-    coords = [[p["lon"], p["lat"]] for p in _track]  # GeoJSON is [lon,lat]
+    coords = _track.coords()  # GeoJSON is [lon,lat]
     features = []
-    if _track:
+    if coords:
         # breadcrumb points (sparse to reduce payload if needed)
         features.append({
             "type": "Feature",
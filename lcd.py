@@ -4,7 +4,22 @@ import time
 from pin_defs import LCD_CS, LCD_SCK, LCD_MOSI, LCD_DC, LCD_RST, LCD_BL
 from pin_defs import BTN_CTRL, BTN_UP, BTN_A, BTN_L, BTN_B, BTN_X, BTN_R, BTN_Y, BTN_DOWN
 
-# Color constants
+# DMA flush (RP2040 with rp2.DMA): bytes go straight to the SPI1 TX FIFO
+try:
+    import rp2
+    from machine import mem32
+    _DMA = rp2.DMA
+except (ImportError, AttributeError):
+    _DMA = None
+
+_SPI1_SSPDR = 0x40040008   # SPI1 data register
+_SPI1_SSPSR = 0x4004000C   # SPI1 status register
+_SPI1_SSPICR = 0x40040020  # SPI1 interrupt clear register
+_SSPSR_RNE = 0x04          # RX FIFO not empty
+_SSPSR_BSY = 0x10          # still shifting out
+_DREQ_SPI1_TX = 18
+
+# Color constants (ordinary RGB565; the LCD methods convert to panel order)
 WHITE = 0xFFFF
 BLACK = 0x0000
 RED   = 0xF800
@@ -23,8 +38,13 @@ BUTTONS = {
 }
 
 
+def swap16(c):
+    """RGB565 colour in the panel's byte order (big-endian over SPI)."""
+    return ((c & 0xFF) << 8) | ((c >> 8) & 0xFF)
+
+
 class LCD_1inch3:
-    def __init__(self):
+    def __init__(self, dma=True):
         # SPI & Pin config
         self.width = 240
         self.height = 240
@@ -34,10 +54,28 @@ class LCD_1inch3:
         self.rst = Pin(Pin(LCD_RST), Pin.OUT)
         self.bl = PWM(Pin(LCD_BL))
 
-        # Framebuffer setup
+        # Framebuffer setup. Pixels are stored byte-swapped so the buffer is
+        # already in the panel's order and show() sends it untouched; draw
+        # through the methods below, which swap colours, not through self.fb.
         self.buffer = bytearray(self.width * self.height * 2)
         self.fb = framebuf.FrameBuffer(self.buffer, self.width, self.height, framebuf.RGB565)
 
+        # draw_text: per-font glyph cache and a 2-colour palette (0 = background, 1 = ink)
+        self._glyphs = {}
+        self._palette = framebuf.FrameBuffer(bytearray(4), 2, 1, framebuf.RGB565)
+        self._win = bytearray(4)
+
+        # Async flush: one DMA channel, the slice in flight kept alive until done
+        self._dma = None
+        self._inflight = None
+        if _DMA is not None and dma:
+            try:
+                self._dma = _DMA()
+                self._dma_ctrl = self._dma.pack_ctrl(size=0, inc_write=False, treq_sel=_DREQ_SPI1_TX)
+            except Exception as e:
+                print("LCD DMA unavailable, flushing synchronously:", e)
+                self._dma = None
+
         # Button setup
         self.buttons = {name: Pin(pin, Pin.IN, Pin.PULL_UP) for name, pin in BUTTONS.items()}
 
@@ -56,6 +94,17 @@ class LCD_1inch3:
         self.spi.write(bytearray([d]))
         self.cs(1)
 
+    def _window(self, cmd, start, end):
+        # CASET/RASET: start and end address, big-endian, in one data write
+        w = self._win
+        w[0] = start >> 8; w[1] = start & 0xFF
+        w[2] = end >> 8; w[3] = end & 0xFF
+        self._cmd(cmd)
+        self.dc(1)
+        self.cs(0)
+        self.spi.write(w)
+        self.cs(1)
+
     def _init_display(self):
         self.rst(1); time.sleep(0.05)
         self.rst(0); time.sleep(0.05)
@@ -79,73 +128,103 @@ class LCD_1inch3:
         self.bl.duty_u16(brightness)
 
     def fill(self, color):
-        self.fb.fill(color)
+        self.fb.fill(swap16(color))
 
     def fill_rect(self, x, y, w, h, color):
-        self.fb.fill_rect(x, y, w, h, color)
+        self.fb.fill_rect(x, y, w, h, swap16(color))
 
     def text(self, string, x, y, color):
-        self.fb.text(string, x, y, color)
-
-    def draw_text(self, font, text, x, y, color=0x0000):
-        CHAR_WIDTH = font.WIDTH
-        CHAR_HEIGHT = font.HEIGHT
-        FONT_DATA = memoryview(font.FONT)
-        BYTES_PER_ROW = CHAR_WIDTH // 8
-        BYTES_PER_CHAR = CHAR_HEIGHT * BYTES_PER_ROW
-        FONT_LEN = len(FONT_DATA)
-
+        self.fb.text(string, x, y, swap16(color))
+
+    def _glyph(self, font, ch_ord):
+        """MONO_HLSB FrameBuffer for one character, built on first use."""
+        cache = self._glyphs.get(font)
+        if cache is None:
+            cache = self._glyphs[font] = {}
+        g = cache.get(ch_ord)
+        if g is None:
+            w = font.WIDTH
+            h = font.HEIGHT
+            n = h * ((w + 7) // 8)
+            offset = ch_ord * n
+            if ch_ord < 0 or offset + n > len(font.FONT):
+                return None
+            # Font rows are already MSB-first, whole bytes per row: MONO_HLSB
+            g = framebuf.FrameBuffer(bytearray(font.FONT[offset:offset + n]), w, h, framebuf.MONO_HLSB)
+            cache[ch_ord] = g
+        return g
+
+    def draw_text(self, font, text, x, y, color=0x0000, bg=None):
+        """Text from a bitmap font module; bg=None leaves the background as is."""
+        pal = self._palette
+        color = swap16(color)
+        if bg is None:
+            key = color ^ 0xFFFF  # any colour but color: unset bits map to it and are skipped
+            pal.pixel(0, 0, key)
+        else:
+            key = -1
+            pal.pixel(0, 0, swap16(bg))
+        pal.pixel(1, 0, color)
+        blit = self.fb.blit
         cursor_x = x
         cursor_y = y
 
         for ch in text:
             if ch == '\n':
                 cursor_x = x  # Reset to starting x
-                cursor_y += CHAR_HEIGHT + 1  # Move to next line
+                cursor_y += font.HEIGHT + 1  # Move to next line
                 continue
-
-            ch_ord = ord(ch)
-            offset = ch_ord * BYTES_PER_CHAR
-
-            if ch_ord < 0 or offset + BYTES_PER_CHAR > FONT_LEN:
-                print(f"Skipping unsupported char '{ch}' (ord: {ch_ord})")
+            g = self._glyph(font, ord(ch))
+            if g is None:
+                print(f"Skipping unsupported char '{ch}' (ord: {ord(ch)})")
                 continue
+            blit(g, cursor_x, cursor_y, key, pal)
+            cursor_x += font.WIDTH + 1  # Advance to next char position
 
-            glyph = FONT_DATA[offset : offset + BYTES_PER_CHAR]
-
-            for row in range(CHAR_HEIGHT):
-                row_offset = row * BYTES_PER_ROW
-
-                if BYTES_PER_ROW == 1:
-                    bits = glyph[row_offset]
-                elif BYTES_PER_ROW == 2:
-                    bits = (glyph[row_offset] << 8) | glyph[row_offset + 1]
-                else:
-                    print(f"Unsupported font width: {CHAR_WIDTH}")
-                    continue
-
-                for col in range(CHAR_WIDTH):
-                    if bits & (1 << (CHAR_WIDTH - 1 - col)):
-                        self.fb.pixel(cursor_x + col, cursor_y + row, color)
-
-            cursor_x += CHAR_WIDTH + 1  # Advance to next char position
-        
     def show(self):
-        # Swap R and B bytes in place (convert RGB565 → BGR565)
-        for i in range(0, len(self.buffer), 2):
-            self.buffer[i], self.buffer[i+1] = self.buffer[i+1], self.buffer[i]
-    
-        # Now continue with the normal RAM write...
-        self._cmd(0x2A)
-        self._data(0 >> 8); self._data(0 & 0xFF)
-        self._data((self.width - 1) >> 8); self._data((self.width - 1) & 0xFF)
-
-        self._cmd(0x2B)
-        self._data(0 >> 8); self._data(0 & 0xFF)
-        self._data((self.height - 1) >> 8); self._data((self.height - 1) & 0xFF)
-
+        return self.show_rows(0, self.height)
+
+    def show_rows(self, y0, y1):
+        """Send rows y0..y1-1 (full width): one contiguous slice of the buffer.
+
+        With DMA this returns as soon as the transfer has started; call
+        wait() before drawing into those rows again.
+        """
+        y0 = max(y0, 0)
+        y1 = min(y1, self.height)
+        if y0 >= y1:
+            return 0
+        self.wait()
+        row = self.width * 2
+        data = memoryview(self.buffer)[y0 * row:y1 * row]
+        self._window(0x2A, 0, self.width - 1)
+        self._window(0x2B, y0, y1 - 1)
         self._cmd(0x2C)
         self.dc(1); self.cs(0)
-        self.spi.write(self.buffer)
+        if self._dma is None:
+            self.spi.write(data)
+            self.cs(1)
+        else:
+            self._inflight = data
+            self._dma.config(read=data, write=_SPI1_SSPDR, count=len(data),
+                             ctrl=self._dma_ctrl, trigger=True)
+        return len(data)
+
+    def busy(self):
+        """True while a DMA flush is still going out."""
+        if self._inflight is None:
+            return False
+        if self._dma.active() or mem32[_SPI1_SSPSR] & _SSPSR_BSY:
+            return True
+        # Done: drop what the TX-only transfer left in the RX FIFO, end the frame
+        while mem32[_SPI1_SSPSR] & _SSPSR_RNE:
+            mem32[_SPI1_SSPDR]
+        mem32[_SPI1_SSPICR] = 1  # receive overrun
         self.cs(1)
+        self._inflight = None
+        return False
 
+    def wait(self):
+        """Block until the last flush has gone out."""
+        while self.busy():
+            pass
@@ -1,10 +1,11 @@
 import time
 import system_state
 
+_last_logged_version = -1
+
 def start_logging(gps_data):
-    gps_time = gps_data.get("time", "")
-    if gps_time and gps_time != "---":
-        time_str = gps_time.replace(":", "").replace(" UTC", "")
+    time_str = gps_data.hhmmss()
+    if time_str:
         filename = f"log_{time_str}.csv"
     else:
         t = time.localtime()
@@ -24,13 +25,16 @@ def stop_logging():
         system_state.log_file = None
     system_state.logging = False
 
-def log_if_needed(gps_data): 
-    if system_state.logging and gps_data.get("fix"):
+def log_if_needed(gps_data):
+    # One row per new GPS update rather than one per main-loop pass
+    global _last_logged_version
+    if system_state.logging and gps_data.quality >= 0 and gps_data.version != _last_logged_version:
+        _last_logged_version = gps_data.version
         try:
-            time_str = gps_data.get('time', '').replace(" UTC", "")
-            lat = gps_data.get('lat', '').split(": ")[1] if "Lat: " in gps_data.get('lat', '') else ''
-            lon = gps_data.get('lon', '').split(": ")[1] if "Lon: " in gps_data.get('lon', '') else ''
-            heading = gps_data.get('heading', '').split(": ")[1].replace("ø", "") if "Head: " in gps_data.get('heading', '') else ''
+            time_str = gps_data.time_text().replace(" UTC", "")
+            lat = "" if gps_data.lat is None else "{:.6f}".format(gps_data.lat)
+            lon = "" if gps_data.lon is None else "{:.6f}".format(gps_data.lon)
+            heading = "" if gps_data.heading is None else "{:.2f}".format(gps_data.heading)
             line = f"{time_str},{lat},{lon},{heading}\n"
             system_state.log_file.write(line)
         except Exception as e:
@@ -1,4 +1,3 @@
-import time
 import network_utils
 import gps_utils
 import display_utils
@@ -9,50 +8,95 @@ import system_state
 import _thread
 import rover_control
 import waypoint_utils
+import rtcm_utils
+import scheduler
 from machine import Pin
 import pin_defs
 
-system_state.display_lines[0] = "Starting..."
+system_state.set_display_line(0, "Starting...")
 
 # Load waypoints
 system_state.waypoints = waypoint_utils.load_waypoints()
 system_state.wp_count = len(system_state.waypoints)
-print("Loaded waypoints:", system_state.waypoints)
+print("Loaded waypoints:", system_state.wp_count)
 
 display_utils.update_display()
 
 # Connect to WiFi and display IP
 ip = network_utils.connect_wifi()
-system_state.display_lines[6] = "IP: " + str(ip)
+system_state.set_display_line(6, "IP: " + str(ip))
 
-# Start web server thread
-_thread.start_new_thread(web_server.start_file_server, (ip, 80))
+# Web server is polled from the core 0 loop (core 1 runs control)
+web_server.open_server(ip, 80)
 
-# Connect to NTRIP caster
-ntrip_socket = network_utils.connect_ntrip()
+# NTRIP caster connection, stepped from the main loop
+ntrip = network_utils.NtripClient()
 
-last_display = time.ticks_ms()
+# Only whole, CRC-checked RTCM3 frames reach the receiver
+rtcm = rtcm_utils.RtcmFramer(gps_utils.write_rtcm)
+system_state.rtcm = rtcm
+system_state.ntrip = ntrip
 
 gps_utils.disable_pps()
+# No start_ingest(): its soft IRQ would run on core 0, so a blocked UI loop
+# would starve core 1 of GPS data. gps_task polls the UART from core 1.
 
-# Main loop
-while True:	
-    gps_data = gps_utils.read_and_parse(system_state.gps_data)
-    button_handler.check_buttons(system_state.gps_data)
-    logging_utils.log_if_needed(system_state.gps_data)
+# --- core 1: GPS ingest, RC capture and steering -----------------------------
+def gps_task():
+    # Polls gps_uart into gps_ring, then parses; every 10 ms keeps the
+    # 4 KB driver buffer far from full at 115200 baud
+    gps_utils.read_and_parse(system_state.gps_data)
+
+def control_task():
     rover_control.update()
-    
-    if ntrip_socket:
-        chunk = network_utils.poll_ntrip_socket(ntrip_socket)
-        if isinstance(chunk, (bytes, bytearray)) and chunk:
-            gps_utils.write_rtcm(chunk)
-            
-    if system_state.display_enabled and time.ticks_diff(time.ticks_ms(), last_display) > 200:
+    system_state.publish_state()
+
+rt_sched = scheduler.Scheduler()
+rt_sched.add("control", control_task, 20, priority=2, stage="rover_control.update")
+rt_sched.add("gps", gps_task, 10, priority=1, stage="read_and_parse")
+system_state.rt_scheduler = rt_sched
+
+# --- core 0: UI, web, logging, NTRIP -----------------------------------------
+def view_task():
+    system_state.refresh_view()
+    gps_utils.track_update(system_state.view.fix)
+
+def ntrip_task():
+    chunk = ntrip.step()
+    if chunk:
+        rtcm.feed(chunk)
+
+def web_task():
+    web_server.poll_server()
+
+def display_task():
+    if system_state.display_enabled:
         system_state.update_display_lines()
         display_utils.update_display()
-        last_display = time.ticks_ms()
 
+def logging_task():
+    logging_utils.log_if_needed(system_state.view.fix)
+
+def buttons_task():
+    button_handler.check_buttons(system_state.view.fix)
+
+def shutdown_task():
     if web_server.check_shutdown():
         web_server.stop()
-        break
-    time.sleep_ms(2)
\ No newline at end of file
+        rt_sched.stop()
+        sched.stop()
+
+# Higher priority runs first whenever several tasks are due
+sched = scheduler.Scheduler()
+sched.add("view", view_task, 20, priority=6)
+sched.add("ntrip", ntrip_task, 20, priority=5, stage="ntrip_poll")
+sched.add("web", web_task, 50, priority=4)
+sched.add("buttons", buttons_task, 50, priority=3, stage="check_buttons")
+sched.add("logging", logging_task, 100, priority=2, stage="log_if_needed")
+sched.add("display", display_task, 200, priority=1)
+sched.add("shutdown", shutdown_task, 500, priority=0)
+system_state.scheduler = sched
+
+# Main loops
+_thread.start_new_thread(rt_sched.run, ())
+sched.run()
@@ -0,0 +1,107 @@
+# metrics.py
+# Per-stage run-time statistics: min / max / mean and a fixed-bucket
+# histogram. record() allocates nothing (all counters stay small ints), so
+# it can wrap every stage of both loops permanently.
+from array import array
+
+# Histogram upper edges in microseconds; the last bucket is "above 100 ms"
+BUCKET_EDGES_US = (50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000)
+_NBUCKETS = len(BUCKET_EDGES_US) + 1
+
+_stages = []   # registration order
+_by_name = {}
+
+
+class StageStats:
+    __slots__ = ("name", "count", "sum_s", "sum_us", "min_us", "max_us", "hist", "reset_pending")
+
+    def __init__(self, name):
+        self.name = name
+        self.hist = array('I', bytes(4 * _NBUCKETS))
+        self.reset_pending = False
+        self._clear()
+
+    def _clear(self):
+        self.count = 0
+        self.sum_s = 0      # the sum is split so it never outgrows a small int
+        self.sum_us = 0
+        self.min_us = 0
+        self.max_us = 0
+        hist = self.hist
+        for i in range(_NBUCKETS):
+            hist[i] = 0
+        self.reset_pending = False
+
+    def record(self, us):
+        # Resets are requested from the other core and applied by the owner
+        if self.reset_pending:
+            self._clear()
+        if self.count == 0 or us < self.min_us:
+            self.min_us = us
+        if us > self.max_us:
+            self.max_us = us
+        self.count += 1
+        self.sum_us += us
+        if self.sum_us >= 1000000:
+            self.sum_s += self.sum_us // 1000000
+            self.sum_us %= 1000000
+        b = 0
+        for edge in BUCKET_EDGES_US:
+            if us < edge:
+                break
+            b += 1
+        self.hist[b] += 1
+
+    def mean_us(self):
+        if not self.count:
+            return 0
+        return (self.sum_s * 1000000 + self.sum_us) // self.count
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "min_us": self.min_us,
+            "max_us": self.max_us,
+            "mean_us": self.mean_us(),
+            "hist": list(self.hist),
+        }
+
+
+def stage(name):
+    """The StageStats called name, created on first use."""
+    s = _by_name.get(name)
+    if s is None:
+        s = StageStats(name)
+        _by_name[name] = s
+        _stages.append(s)
+    return s
+
+
+def reset():
+    for s in _stages:
+        s.reset_pending = True
+
+
+def as_dict():
+    return {
+        "bucket_edges_us": list(BUCKET_EDGES_US),
+        "stages": {s.name: s.as_dict() for s in _stages},
+    }
+
+
+def as_prometheus():
+    """Prometheus text exposition of every stage as a histogram."""
+    out = []
+    out.append("# TYPE rover_stage_seconds histogram")
+    for s in _stages:
+        label = 'stage="%s"' % s.name
+        acc = 0
+        for i, edge in enumerate(BUCKET_EDGES_US):
+            acc += s.hist[i]
+            out.append('rover_stage_seconds_bucket{%s,le="%g"} %d' % (label, edge / 1e6, acc))
+        acc += s.hist[_NBUCKETS - 1]
+        out.append('rover_stage_seconds_bucket{%s,le="+Inf"} %d' % (label, acc))
+        out.append('rover_stage_seconds_sum{%s} %.6f' % (label, s.sum_s + s.sum_us / 1e6))
+        out.append('rover_stage_seconds_count{%s} %d' % (label, s.count))
+        out.append('rover_stage_max_seconds{%s} %.6f' % (label, s.max_us / 1e6))
+    return "\n".join(out) + "\n"
@@ -3,6 +3,8 @@ import socket
 import ubinascii
 import time
 import json
+import errno
+import select
 import system_state
 import display_utils
 import env_utils
@@ -52,7 +54,7 @@ def show_and_log_scan_results(scan_results):
     available = []
     print(f"Scan results ({len(scan_results)} networks):")
     for i in range(2, 11):
-        system_state.display_lines[i] = ""
+        system_state.set_display_line(i, "")
 
     for idx, net in enumerate(scan_results):
         try:
@@ -63,7 +65,7 @@ def show_and_log_scan_results(scan_results):
                 available.append(ssid)
                 print(f"  SSID: {ssid}, RSSI: {rssi} dBm")
                 if idx < 8:
-                    system_state.display_lines[2 + idx] = f"{ssid} ({rssi}dBm)"
+                    system_state.set_display_line(2 + idx, f"{ssid} ({rssi}dBm)")
         except Exception as e:
             print("Error decoding SSID:", e)
 
@@ -78,24 +80,24 @@ def connect_wifi():
     time.sleep(3)
 
     for scan_attempt in range(3):
-        system_state.display_lines[0] = f"Scan attempt {scan_attempt + 1}..."
+        system_state.set_display_line(0, f"Scan attempt {scan_attempt + 1}...")
         for i in range(2, 7):
-            system_state.display_lines[i] = ""
+            system_state.set_display_line(i, "")
         display_utils.update_display()
 
         scan_results = scan_for_networks(wlan)
         available_ssids = show_and_log_scan_results(scan_results)
 
-        system_state.display_lines[1] = f"{len(available_ssids)} networks found"
+        system_state.set_display_line(1, f"{len(available_ssids)} networks found")
         display_utils.update_display()
         time.sleep(0.5)
 
         for ssid, password in PREFERRED_NETWORKS:
             if ssid in available_ssids:
                 print(f"Connecting to {ssid}...")
-                system_state.display_lines[2] = f"Connecting to {ssid}..."
+                system_state.set_display_line(2, f"Connecting to {ssid}...")
                 start_time = time.time()
-                system_state.display_lines[3] = "Waiting for connection..."
+                system_state.set_display_line(3, "Waiting for connection...")
                 display_utils.update_display()
                 time.sleep(0.5)
                 wlan.disconnect()
@@ -113,7 +115,7 @@ def connect_wifi():
 
                     if time.time() - start_time > 18:
                         print("Connection timeout.")
-                        system_state.display_lines[4] = "Timeout, retrying..."
+                        system_state.set_display_line(4, "Timeout, retrying...")
                         display_utils.update_display()
                         wlan.disconnect()
                         time.sleep(2)
@@ -121,22 +123,22 @@ def connect_wifi():
                 else:
                     ip = wlan.ifconfig()[0]
                     print(f"Connected to {ssid} with IP {ip}")
-                    system_state.display_lines[5] = f"Connected: {ssid}"
+                    system_state.set_display_line(5, f"Connected: {ssid}")
                     system_state.wifi_connected = True
                     system_state.wifi_ssid = ssid
                     system_state.wifi_ip = ip
                     for i in range(6, 11):
-                        system_state.display_lines[i] = ""
+                        system_state.set_display_line(i, "")
                     display_utils.update_display()
                     return ip
 
         print("No preferred networks found.")
-        system_state.display_lines[6] = "No preferred networks"
+        system_state.set_display_line(6, "No preferred networks")
         display_utils.update_display()
         time.sleep(2)
 
     print("Wi-Fi failed. Halting.")
-    system_state.display_lines[7] = "Wi-Fi failed. Halting."
+    system_state.set_display_line(7, "Wi-Fi failed. Halting.")
     system_state.wifi_connected = False
     system_state.wifi_ssid = ""
     system_state.wifi_ip = ""
@@ -144,56 +146,214 @@ def connect_wifi():
     while True:
         time.sleep(1)
 
-import system_state
-import display_utils
+NTRIP_IDLE = "idle"
+NTRIP_CONNECTING = "connecting"
+NTRIP_REQUEST = "request"
+NTRIP_STREAMING = "streaming"
+NTRIP_BACKOFF = "backoff"
+
+NTRIP_CONNECT_TIMEOUT_MS = 5000
+NTRIP_RESPONSE_TIMEOUT_MS = 5000
+NTRIP_STALL_MS = 10000
+NTRIP_BACKOFF_MIN_MS = 1000
+NTRIP_BACKOFF_MAX_MS = 60000
+
+class NtripClient:
+    """
+    NTRIP caster connection stepped from the main loop. step() never sleeps
+    or blocks on the socket (only the first DNS lookup can block); it
+    returns RTCM bytes when some arrived, else None. Failures and stalls
+    close the socket and retry with exponential backoff.
+    """
+    def __init__(self, host=NTRIP_HOST, port=NTRIP_PORT, mountpoint=MOUNTPOINT,
+                 username=USERNAME, password=PASSWORD):
+        self.host = host
+        self.port = port
+        auth = ubinascii.b2a_base64(f"{username}:{password}".encode()).decode().strip()
+        self._request = (
+            f"GET /{mountpoint} HTTP/1.0\r\n"
+            f"User-Agent: NTRIP PicoClient\r\n"
+            f"Authorization: Basic {auth}\r\n\r\n"
+        ).encode()
+        self._addr = None
+        self.sock = None
+        self._poll = None
+        self._header = b""
+        self._sent = 0
+        self.state = NTRIP_IDLE
+        self._state_ticks = time.ticks_ms()
+        self.backoff_ms = NTRIP_BACKOFF_MIN_MS
+        self.attempts = 0
+        self.reconnects = 0
+        self.last_error = ""
+        self._publish()
+
+    def _publish(self):
+        system_state.ntrip_state = self.state
+        system_state.ntrip_reconnects = self.reconnects
+        system_state.ntrip_connected = self.state == NTRIP_STREAMING
+
+    def _enter(self, state):
+        self.state = state
+        self._state_ticks = time.ticks_ms()
+        self._publish()
+
+    def _elapsed(self):
+        return time.ticks_diff(time.ticks_ms(), self._state_ticks)
+
+    def _close(self):
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except Exception:
+                pass
+        self.sock = None
+        self._poll = None
 
-def connect_ntrip(max_attempts=3, retry_delay=5):
-    for attempt in range(1, max_attempts + 1):
+    def _fail(self, reason):
+        print("NTRIP:", reason)
+        self.last_error = reason
+        was_streaming = self.state == NTRIP_STREAMING
+        self._close()
+        if was_streaming:
+            self.backoff_ms = NTRIP_BACKOFF_MIN_MS
+        else:
+            self.backoff_ms = min(self.backoff_ms * 2, NTRIP_BACKOFF_MAX_MS)
+        self._enter(NTRIP_BACKOFF)
+
+    def _start_connect(self):
+        self.attempts += 1
+        if self.attempts > 1:
+            self.reconnects += 1
         try:
-            status_msg = f"NTRIP attempt {attempt}..."
-            print(status_msg)
-            system_state.display_lines[8] = status_msg
-            display_utils.update_display()
-            time.sleep(1)
-            auth = ubinascii.b2a_base64(f"{USERNAME}:{PASSWORD}".encode()).decode().strip()
-            headers = (
-                f"GET /{MOUNTPOINT} HTTP/1.0\r\n"
-                f"User-Agent: NTRIP PicoClient\r\n"
-                f"Authorization: Basic {auth}\r\n\r\n"
-            )
-            addr = socket.getaddrinfo(NTRIP_HOST, NTRIP_PORT)[0][-1]
+            if self._addr is None:
+                self._addr = socket.getaddrinfo(self.host, self.port)[0][-1]
             s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            s.settimeout(2.0)
-            s.connect(addr)
-            s.send(headers.encode())
-            response = s.recv(1024)
-            if b"200 OK" not in response:
-                print("NTRIP connection failed (bad response)", response)
-                s.close()
-                continue
-
-            print("Connected to NTRIP caster")
-            system_state.display_lines[8] = "NTRIP connected"
-            display_utils.update_display()
-
-            s.settimeout(0.1)
-            system_state.ntrip_connected = True
-            system_state.last_ntrip_rx_ticks = time.ticks_ms()
-            return s
-
+            s.setblocking(False)
+            self.sock = s
+            try:
+                s.connect(self._addr)
+            except OSError as e:
+                if e.args[0] not in (errno.EINPROGRESS, errno.EAGAIN):
+                    raise
+            self._poll = select.poll()
+            self._poll.register(s, select.POLLOUT)
+            self._header = b""
+            self._sent = 0
+            self._enter(NTRIP_CONNECTING)
         except Exception as e:
-            print(f"NTRIP connection error: {e}")
-            system_state.display_lines[8] = f"NTRIP error: retrying"
-            display_utils.update_display()
-
-            if attempt < max_attempts:
-                time.sleep(retry_delay)
-            else:
-                system_state.display_lines[8] = "NTRIP FAILED"
-                system_state.ntrip_connected = False
-                display_utils.update_display()
+            self._addr = None  # resolve again next time
+            self._fail(f"connect error: {e}")
+
+    def step(self):
+        state = self.state
+        if state == NTRIP_IDLE:
+            self._start_connect()
+        elif state == NTRIP_BACKOFF:
+            if self._elapsed() >= self.backoff_ms:
+                self._start_connect()
+        elif state == NTRIP_CONNECTING:
+            ready = self._poll.poll(0)
+            if ready:
+                if ready[0][1] & (select.POLLERR | select.POLLHUP):
+                    self._fail("connect refused")
+                    return None
+                # A non-blocking send may take only part of the request
+                try:
+                    n = self.sock.send(memoryview(self._request)[self._sent:])
+                except OSError as e:
+                    if e.args[0] != errno.EAGAIN:
+                        self._fail(f"send error: {e}")
+                        return None
+                    n = 0
+                self._sent += n or 0
+                if self._sent >= len(self._request):
+                    self._enter(NTRIP_REQUEST)
+            elif self._elapsed() > NTRIP_CONNECT_TIMEOUT_MS:
+                self._fail("connect timeout")
+        elif state == NTRIP_REQUEST:
+            return self._read_response()
+        elif state == NTRIP_STREAMING:
+            return self._read_stream()
+        return None
+
+    def _recv(self, n):
+        # -> bytes, b"" if nothing is waiting, None if the socket is gone
+        try:
+            data = self.sock.recv(n)
+        except OSError as e:
+            if e.args[0] in (errno.EAGAIN, errno.ETIMEDOUT):
+                return b""
+            self._fail(f"recv error: {e}")
+            return None
+        if not data:
+            self._fail("closed by caster")
+            return None
+        return data
+
+    def _read_response(self):
+        data = self._recv(256)
+        if data is None:
+            return None
+        if not data:
+            if self._elapsed() > NTRIP_RESPONSE_TIMEOUT_MS:
+                self._fail("no response")
+            return None
+        self._header += data
+        head = self._header
+        eol = head.find(b"\r\n")
+        if eol < 0:
+            if len(head) > 1024:
+                self._fail("bad response")
+            return None
+        status = head[:eol]
+        parts = status.split()
+        # "ICY 200 OK" (v1) or "HTTP/1.x 200 OK"; a SOURCETABLE means no such mountpoint
+        if len(parts) < 2 or parts[1] != b"200" or parts[0] == b"SOURCETABLE":
+            self._header = b""
+            self._fail(f"bad response {status[:40]}")
+            return None
+        if parts[0] == b"ICY":
+            # NTRIP v1: RTCM may follow the status line at once; a stray
+            # blank line is skipped by the framer's preamble search
+            rest = head[eol + 2:]
+            if rest.startswith(b"\r\n"):
+                rest = rest[2:]
+        else:
+            end = head.find(b"\r\n\r\n")
+            if end < 0:
+                if len(head) > 1024:
+                    self._fail("bad response")
                 return None
-            
+            rest = head[end + 4:]
+        self._header = b""
+        print("Connected to NTRIP caster")
+        self.backoff_ms = NTRIP_BACKOFF_MIN_MS
+        system_state.last_ntrip_rx_ticks = time.ticks_ms()
+        self._enter(NTRIP_STREAMING)
+        return rest or None
+
+    def _read_stream(self):
+        data = self._recv(512)
+        if data is None:
+            return None
+        if data:
+            system_state.last_ntrip_rx_ticks = time.ticks_ms()
+            return data
+        # stall watchdog
+        silence_ms = time.ticks_diff(time.ticks_ms(), system_state.last_ntrip_rx_ticks)
+        if silence_ms > NTRIP_STALL_MS:
+            self._fail("stream stalled")
+        return None
+
+    def status(self):
+        return {
+            "state": self.state,
+            "reconnects": self.reconnects,
+            "backoff_ms": self.backoff_ms,
+            "last_error": self.last_error,
+        }
+
 def get_wlan():
     global _wlan
     if _wlan is None:
@@ -209,45 +369,3 @@ def ensure_wifi():
     # try reconnect using your existing connect_wifi logic
     ip = connect_wifi()
     return bool(ip)
-
-def poll_ntrip_socket(ntrip_socket, timeout_ms=50):
-    """
-    Non-blocking-ish poll of the NTRIP socket. 
-    If data arrives, mark ntrip_connected and update last_ntrip_rx_ticks.
-    If socket errors, mark disconnected and return None (caller can reconnect).
-    """
-    if ntrip_socket is None:
-        system_state.ntrip_connected = False
-        return None
-    try:
-        ntrip_socket.settimeout(timeout_ms / 1000.0)
-        chunk = ntrip_socket.recv(256)
-        if chunk:
-            # We received some RTCM—mark alive
-            system_state.ntrip_connected = True
-            system_state.last_ntrip_rx_ticks = time.ticks_ms()
-            return chunk
-    except OSError as e:
-        # EAGAIN / timeout is fine; just check last activity
-        pass
-    except Exception as e:
-        print("NTRIP poll error:", e)
-        try:
-            ntrip_socket.close()
-        except:
-            pass
-        system_state.ntrip_connected = False
-        return None
-
-    # If no data for a while, consider it down (e.g., >10s with no bytes)
-    if system_state.last_ntrip_rx_ticks is None:
-        # we haven't seen any data yet—treat as unknown/down
-        system_state.ntrip_connected = False
-    else:
-        silence_ms = time.ticks_diff(time.ticks_ms(), system_state.last_ntrip_rx_ticks)
-        if silence_ms > 10000:
-            system_state.ntrip_connected = False
-
-    return ntrip_socket
-
-
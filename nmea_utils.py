@@ -0,0 +1,283 @@
+# nmea_utils.py
+# Single-pass NMEA tokenizer and typed field decoders.
+#
+# A sentence is tokenised once into a table of field start offsets; every
+# decoder then works directly on the raw bytes between two offsets, so no
+# str/list objects are created per field. buf must be bytes or bytearray
+# (find() is needed; memoryview does not have it).
+from array import array
+
+MAX_FIELDS = 24
+
+_DOT = 46
+
+
+def new_offsets():
+    """Preallocated offset table for tokenize()."""
+    return array('H', [0] * (MAX_FIELDS + 1))
+
+
+def sentence_key(name):
+    """Pack a 5 char talker+sentence ID (e.g. b"GNGGA") into a small int."""
+    return ((name[0] & 31) << 20) | ((name[1] & 31) << 15) | ((name[2] & 31) << 10) \
+        | ((name[3] & 31) << 5) | (name[4] & 31)
+
+
+def key_at(buf, s):
+    """sentence_key() of the ID following the '$' at buf[s]."""
+    if s + 6 > len(buf):
+        return 0
+    return ((buf[s + 1] & 31) << 20) | ((buf[s + 2] & 31) << 15) | ((buf[s + 3] & 31) << 10) \
+        | ((buf[s + 4] & 31) << 5) | (buf[s + 5] & 31)
+
+
+def find_start(buf, start, end):
+    """Index of the first '$' in buf[start:end], or -1."""
+    return buf.find(b'$', start, end)
+
+
+def tokenize(buf, start, end, offs):
+    """
+    Record the field offsets of the sentence in buf[start:end] into offs.
+    Field k spans offs[k] .. offs[k + 1] - 1. Field 0 is the '$' + ID.
+    The sentence ends at '*', CR or LF. Returns the number of fields.
+    """
+    # bytes.find() scans in C and returns a small int, so locating each
+    # field costs one call instead of one interpreted step per byte.
+    find = buf.find
+    stop = find(b'*', start, end)
+    if stop < 0:
+        stop = find(b'\r', start, end)
+        if stop < 0:
+            stop = find(b'\n', start, end)
+            if stop < 0:
+                stop = end
+    n = 0
+    offs[0] = start
+    i = find(b',', start, stop)
+    while i >= 0:
+        n += 1
+        if n >= MAX_FIELDS:
+            stop = i
+            break
+        offs[n] = i + 1
+        i = find(b',', i + 1, stop)
+    n += 1
+    offs[n] = stop + 1
+    return n
+
+
+def _xor_py(buf, start, stop):
+    cs = 0
+    for i in range(start, stop):
+        cs ^= buf[i]
+    return cs
+
+try:
+    import micropython
+
+    @micropython.viper
+    def _xor_viper(buf, start: int, stop: int) -> int:
+        p = ptr8(buf)
+        cs = 0
+        i = start
+        while i < stop:
+            cs ^= p[i]
+            i += 1
+        return cs
+
+    xor_bytes = _xor_viper
+except ImportError:
+    xor_bytes = _xor_py
+
+
+def _hex(c):
+    if 48 <= c <= 57:
+        return c - 48
+    c |= 32  # lower case
+    if 97 <= c <= 102:
+        return c - 87
+    return -1
+
+
+def checksum_ok(buf, start, end, offs, n):
+    """
+    Verify the *hh checksum of a sentence already passed through
+    tokenize(buf, start, end, offs) which returned n.
+    """
+    star = offs[n] - 1
+    if star + 3 > end or buf[star] != 42:  # '*'
+        return False
+    hi = _hex(buf[star + 1])
+    lo = _hex(buf[star + 2])
+    if hi < 0 or lo < 0:
+        return False
+    return xor_bytes(buf, start + 1, star) == (hi << 4) | lo
+
+
+def _dec_uint_py(buf, s, e):
+    # Digits in buf[s:e] as an int; -1 on any other byte or over 9 digits
+    if e - s > 9:
+        return -1
+    v = 0
+    while s < e:
+        d = buf[s] - 48
+        if d < 0 or d > 9:
+            return -1
+        v = v * 10 + d
+        s += 1
+    return v
+
+
+def _split_decimal_py(buf, s, e, out):
+    # Writes integer part, fraction digits as int (first 7) and their count
+    # into out; returns 0 if malformed. Integer parts over 9 digits are
+    # malformed too, so every value fits a small int.
+    ip = 0
+    fp = 0
+    nd = 0
+    ni = 0
+    seen_dot = False
+    while s < e:
+        c = buf[s]
+        if c == _DOT:
+            if seen_dot:
+                return 0
+            seen_dot = True
+        else:
+            d = c - 48
+            if d < 0 or d > 9:
+                return 0
+            if seen_dot:
+                if nd < 7:
+                    fp = fp * 10 + d
+                    nd += 1
+            else:
+                ni += 1
+                if ni > 9:
+                    return 0
+                ip = ip * 10 + d
+        s += 1
+    out[0] = ip
+    out[1] = fp
+    out[2] = nd
+    return 1
+
+try:
+    import micropython
+
+    # The digit loops run once per field: compiled, not interpreted per byte
+    @micropython.viper
+    def _dec_uint_viper(buf, s: int, e: int) -> int:
+        if e - s > 9:
+            return -1
+        p = ptr8(buf)
+        v = 0
+        while s < e:
+            c = int(p[s])
+            if c < 48 or c > 57:
+                return -1
+            v = v * 10 + c - 48
+            s += 1
+        return v
+
+    @micropython.viper
+    def _split_decimal_viper(buf, s: int, e: int, out) -> int:
+        p = ptr8(buf)
+        o = ptr32(out)
+        ip = 0
+        fp = 0
+        nd = 0
+        ni = 0
+        seen_dot = 0
+        while s < e:
+            c = int(p[s])
+            if c == 46:  # '.'
+                if seen_dot:
+                    return 0
+                seen_dot = 1
+            elif c < 48 or c > 57:
+                return 0
+            elif seen_dot:
+                if nd < 7:
+                    fp = fp * 10 + c - 48
+                    nd += 1
+            else:
+                ni += 1
+                if ni > 9:
+                    return 0
+                ip = ip * 10 + c - 48
+            s += 1
+        o[0] = ip
+        o[1] = fp
+        o[2] = nd
+        return 1
+
+    _dec_uint = _dec_uint_viper
+    _split_decimal = _split_decimal_viper
+except ImportError:
+    _dec_uint = _dec_uint_py
+    _split_decimal = _split_decimal_py
+
+_parts = array('i', [0, 0, 0])  # _split_decimal() output; parsing runs on one core
+
+
+def dec_int(buf, s, e, default=None):
+    """Unsigned decimal integer in buf[s:e]; default if empty or malformed."""
+    if s >= e:
+        return default
+    v = _dec_uint(buf, s, e)
+    return default if v < 0 else v
+
+
+_POW10 = (1.0, 10.0, 100.0, 1000.0, 1e4, 1e5, 1e6, 1e7)
+
+
+def dec_float(buf, s, e, default=None):
+    """Decimal number (optionally signed) in buf[s:e] as a float."""
+    if s >= e:
+        return default
+    neg = buf[s] == 45  # '-'
+    if neg:
+        s += 1
+    parts = _parts
+    if not _split_decimal(buf, s, e, parts):
+        return default
+    ip = parts[0]
+    fp = parts[1]
+    nd = parts[2]
+    v = ip + fp / _POW10[nd] if nd else float(ip)
+    return -v if neg else v
+
+
+def dec_coord(buf, s, e, hs, he):
+    """
+    NMEA [d]ddmm.mmmm plus hemisphere field -> signed decimal degrees.
+    Returns None if either field is empty.
+    """
+    if s >= e or hs >= he:
+        return None
+    parts = _parts
+    if not _split_decimal(buf, s, e, parts):
+        return None
+    ip = parts[0]
+    fp = parts[1]
+    nd = parts[2]
+    minutes = (ip % 100) + (fp / _POW10[nd] if nd else 0.0)
+    v = ip // 100 + minutes / 60
+    h = buf[hs]
+    if h == 83 or h == 87:  # 'S' / 'W'
+        v = -v
+    return v
+
+
+def dec_hhmmss(buf, s, e):
+    """UTC hhmmss[.ss] -> whole seconds of day, or -1."""
+    if e - s < 6:
+        return -1
+    hh = dec_int(buf, s, s + 2)
+    mm = dec_int(buf, s + 2, s + 4)
+    ss = dec_int(buf, s + 4, s + 6)
+    if hh is None or mm is None or ss is None:
+        return -1
+    return hh * 3600 + mm * 60 + ss
@@ -0,0 +1,71 @@
+# rc_capture.py
+# Non-blocking RC receiver pulse capture. Each channel timestamps its rising
+# and falling edges in a hard pin IRQ, so reading the latest pulse width is
+# a couple of attribute loads instead of a blocking time_pulse_us().
+from machine import Pin
+import time
+
+MIN_PULSE_US = 900
+MAX_PULSE_US = 2200
+SIGNAL_TIMEOUT_MS = 100   # 5 frames at 50 Hz without a good pulse = lost
+
+
+class RcChannel:
+    def __init__(self, pin_no, default_us=1500, timeout_ms=SIGNAL_TIMEOUT_MS):
+        self.default_us = default_us
+        self.timeout_ms = timeout_ms
+        # Written only by the IRQ
+        self.width_us = default_us
+        self.pulses = 0          # good pulses seen
+        self.rejects = 0         # pulses outside MIN..MAX
+        self._rise_us = 0
+        # Written only by the reader
+        self._seen = 0
+        self._seen_ms = time.ticks_ms()
+        self.losses = 0          # valid -> lost transitions
+        self.ok = False          # result of the last valid() check
+        self.pin = Pin(pin_no, Pin.IN)
+        self.pin.irq(self._edge, Pin.IRQ_RISING | Pin.IRQ_FALLING, hard=True)
+
+    def _edge(self, pin):
+        # Hard IRQ: no allocation, no printing
+        now = time.ticks_us()
+        if pin.value():
+            self._rise_us = now
+            return
+        w = time.ticks_diff(now, self._rise_us)
+        if MIN_PULSE_US < w < MAX_PULSE_US:
+            self.width_us = w
+            self.pulses += 1
+        else:
+            self.rejects += 1
+
+    def age_ms(self):
+        """Milliseconds since the last good pulse was noticed."""
+        p = self.pulses
+        if p != self._seen:
+            self._seen = p
+            self._seen_ms = time.ticks_ms()
+        return time.ticks_diff(time.ticks_ms(), self._seen_ms)
+
+    def valid(self):
+        """True while good pulses keep arriving."""
+        ok = self.pulses != 0 and self.age_ms() < self.timeout_ms
+        if self.ok and not ok:
+            self.losses += 1
+        self.ok = ok
+        return ok
+
+    def read(self):
+        """Latest pulse width, or default_us if the signal is lost."""
+        return self.width_us if self.valid() else self.default_us
+
+    def stats(self):
+        return {
+            "width_us": self.width_us,
+            "age_ms": self.age_ms(),
+            "valid": self.ok,
+            "pulses": self.pulses,
+            "rejects": self.rejects,
+            "losses": self.losses,
+        }
@@ -0,0 +1,109 @@
+# ring_buffer.py
+# Fixed-size byte ring for UART ingestion. Bytes are read straight into the
+# preallocated bytearray and lines are handed out as (buf, start, end)
+# ranges, so steady-state reading allocates nothing but a memoryview slice.
+#
+# One slot is always left empty so that head == tail means "empty". The
+# producer (fill_from) only moves head and the consumer (drain_lines) only
+# moves tail, so one of each may run from an IRQ handler without a lock.
+
+
+class ByteRing:
+    def __init__(self, size, max_line=128):
+        self.buf = bytearray(size)
+        self._mv = memoryview(self.buf)
+        self.size = size
+        self.head = 0           # next byte to write
+        self.tail = 0           # next byte to read
+        self._line = bytearray(max_line)  # scratch for lines that wrap
+        self._line_mv = memoryview(self._line)
+        self.received = 0       # bytes accepted
+        self.overflows = 0      # times data arrived with the ring full
+        self.dropped = 0        # bytes discarded
+        self.high_water = 0     # most bytes ever held
+
+    def used(self):
+        return (self.head - self.tail) % self.size
+
+    def free(self):
+        return self.size - 1 - self.used()
+
+    def _note_level(self):
+        used = (self.head - self.tail) % self.size
+        if used > self.high_water:
+            self.high_water = used
+
+    def fill_from(self, uart):
+        """Move whatever the UART has into the ring. Returns bytes read."""
+        pending = uart.any()
+        got = 0
+        size = self.size
+        while pending > 0:
+            head = self.head
+            room = (self.tail - head - 1) % size
+            if room == 0:
+                self.overflows += 1
+                break
+            k = size - head  # contiguous space up to the end of the buffer
+            if k > room:
+                k = room
+            if k > pending:
+                k = pending
+            r = uart.readinto(self._mv[head:head + k], k)
+            if not r:
+                break
+            self.head = (head + r) % size
+            got += r
+            pending -= r
+        self.received += got
+        self._note_level()
+        return got
+
+    def drain_lines(self, fn, arg, max_lines=32):
+        """
+        Call fn(buf, start, end, arg) for each complete '\\n'-terminated line,
+        oldest first. Lines are parsed in place unless they wrap around the
+        end of the ring, in which case they are copied to a scratch buffer.
+        Returns the number of lines handed out.
+        """
+        buf = self.buf
+        size = self.size
+        lines = 0
+        while lines < max_lines:
+            tail = self.tail
+            head = self.head
+            if tail == head:
+                return lines
+            if tail < head:
+                nl = buf.find(b'\n', tail, head)
+                if nl < 0:
+                    return self._discard_if_stuck(lines)
+                fn(buf, tail, nl + 1, arg)
+            else:
+                nl = buf.find(b'\n', tail, size)
+                if nl >= 0:
+                    fn(buf, tail, nl + 1, arg)
+                else:
+                    nl = buf.find(b'\n', 0, head)
+                    if nl < 0:
+                        return self._discard_if_stuck(lines)
+                    first = size - tail
+                    n = first + nl + 1
+                    if n <= len(self._line):
+                        line = self._line_mv
+                        line[0:first] = self._mv[tail:size]
+                        line[first:n] = self._mv[0:nl + 1]
+                        fn(self._line, 0, n, arg)
+                    else:
+                        self.dropped += n
+            self.tail = (nl + 1) % size
+            lines += 1
+        return lines
+
+    def _discard_if_stuck(self, lines):
+        # A full ring without a line ending can never complete: discard it
+        if self.used() == self.size - 1:
+            self.overflows += 1
+            self.dropped += self.size - 1
+            self.tail = self.head
+        return lines
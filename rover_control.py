@@ -1,8 +1,12 @@
 
-from machine import Pin, PWM, time_pulse_us
+from machine import Pin, PWM
+import math
 import time
 from pin_defs import RC_STEERING, RC_MODE, STEER_PWM
-from gps_utils import approx_distance, calculate_bearing
+from rc_capture import RcChannel
+from waypoint_utils import distance_bearing
+from steering import SteeringController, stanley_heading, wrap180
+import env_utils
 import system_state
 
 FULL_LEFT = 1048
@@ -11,6 +15,16 @@ NEUTRAL_STEER = 1500
 AUTO_THRESHOLD = 1500
 TARGET_DISTANCE = 100
 
+_env = env_utils.load_env()
+STANLEY_K = float(_env.get("STANLEY_K", "0.5"))        # cross-track gain
+STANLEY_MIN_SPEED = 0.5  # m/s, keeps the correction sane when (nearly) stopped
+steer_ctrl = SteeringController(
+    float(_env.get("STEER_KP", "0.3")),
+    float(_env.get("STEER_KI", "0.02")),
+    float(_env.get("STEER_KD", "0.05")),
+    limit=30,
+)
+
 wp_index_override_state = {
     "was_high": False
 }
@@ -19,9 +33,11 @@ wp_index_override_state = {
 steer_pwm = PWM(Pin(STEER_PWM))
 steer_pwm.freq(50)
 
-rc_pins = {
-    "steering": Pin(RC_STEERING, Pin.IN),
-    "mode":     Pin(RC_MODE, Pin.IN),
+# Pulse widths are captured by pin IRQs (see rc_capture); the failsafe
+# values apply when a channel stops delivering pulses
+rc_channels = {
+    "steering": RcChannel(RC_STEERING, default_us=NEUTRAL_STEER),
+    "mode":     RcChannel(RC_MODE, default_us=1000),
 }
 
 rc_inputs = {
@@ -30,55 +46,42 @@ rc_inputs = {
 }
 
 def read_rc_inputs():
-    for key, pin in rc_pins.items():
-        try:
-            pulse = time_pulse_us(pin, 1, 20000)  # 25ms timeout
-            if 900 < pulse < 2200:  # sanity check
-                rc_inputs[key] = pulse
-        except OSError:
-            # timeout or invalid pulse
-            pas
-            
+    """Latest captured widths into rc_inputs. Returns False on signal loss."""
+    ok = True
+    for key, ch in rc_channels.items():
+        rc_inputs[key] = ch.read()
+        ok = ok and ch.ok
+    system_state.rc_failsafe = not ok
+    return ok
+
 def constrain(val, min_val, max_val):
     return min(max_val, max(min_val, val))
 
 def map_range(x, in_min, in_max, out_min, out_max):
     return (x - in_min) * (out_max - out_min) / (in_max - in_min) + out_min
 
-def steering_pid(dist, target, last_error, integral):
-    P, I, D = 0.3, 0, 0
-    error = dist - target
-    derivative = error - last_error
-    integral += error
-    return constrain(P * error + I * integral + D * derivative, -90, 90)
-
 def set_esc_throttle(value):  # -1 to 1
     us = int(map_range(value, -1, 1, 1000, 2000))
     duty = int(us * 65535 / 20000)
     esc_pwm.duty_u16(duty)
 
+_last_duty = -1
+
 def set_steering_angle(angle):  # 0 to 180 deg
+    global _last_duty
     us = int(map_range(angle, -30, 30, 1100, 1900))  # adjust for your servo
     duty = int(us * 65535 / 20000)
-    steer_pwm.duty_u16(duty)
-
+    if duty != _last_duty:  # only touch the PWM register on change
+        steer_pwm.duty_u16(duty)
+        _last_duty = duty
 
-def extract_lat_lon():
-    try:
-        lat_str = system_state.gps_data.get("lat", "").split(": ")[1]
-        lon_str = system_state.gps_data.get("lon", "").split(": ")[1]
-        return float(lat_str), float(lon_str)
-    except:
-        return None, None
 
-def extract_heading():
-    try:
-        heading_str = system_state.gps_data.get("heading", "").split(": ")[1].replace("ø", "")
-        return float(heading_str)
-    except:
-        return None
+_hold_start = None  # ticks_ms() when the rover arrived at a waypoint with a hold time
 
 def check_waypoint_advance():
+    global _leg_start, _hold_start
+    mission = system_state.waypoints
+    index = system_state.current_waypoint_index
     # RC override logic: look for rising edge
     steer_us = rc_inputs["steering"]
     nav_distance = system_state.nav_distance
@@ -92,46 +95,145 @@ def check_waypoint_advance():
     else:
         wp_index_override_state["was_high"] = False
 
-    if nav_distance is not None and nav_distance < 2:
-        should_advance = True
+    # A GST error estimate wider than the radius widens it: a poor fix
+    # arrives a little early instead of circling the waypoint for ever.
+    # h_err() is None once GST has gone stale.
+    radius = mission.radius_m(index)
+    h_err = system_state.gps_data.h_err()
+    if h_err is not None and h_err > radius:
+        radius = h_err
+    if _hold_start is not None or (nav_distance is not None and nav_distance < radius):
+        hold_ms = mission.hold_ms(index)
+        if not hold_ms:
+            should_advance = True
+        elif _hold_start is None:
+            _hold_start = time.ticks_ms()
+            print("Holding at waypoint", index, "for", hold_ms, "ms")
+        elif time.ticks_diff(time.ticks_ms(), _hold_start) >= hold_ms:
+            should_advance = True
+    system_state.nav_holding = _hold_start is not None and not should_advance
 
     if should_advance:
-        system_state.current_waypoint_index = (system_state.current_waypoint_index + 1) % system_state.wp_count
+        _leg_start = (mission.east[index], mission.north[index])
+        _hold_start = None
+        system_state.current_waypoint_index = (index + 1) % mission.count
+        system_state.nav_distance = None  # not yet measured to the new waypoint
+        steer_ctrl.reset()
         print("Switching to waypoint", system_state.current_waypoint_index)
 
+def install_mission(mission):
+    """Core 1, between control ticks: start running a new mission from its first waypoint."""
+    global _leg_start, _hold_start, _nav_key
+    system_state.waypoints = mission
+    system_state.wp_count = mission.count
+    system_state.current_waypoint_index = 0
+    system_state.nav_distance = None
+    system_state.nav_cross_track = None
+    system_state.nav_holding = False
+    _leg_start = None
+    _hold_start = None
+    _nav_key = None
+    steer_ctrl.reset()
+    print("Mission loaded:", mission.count, "waypoints")
+
+# Start of the leg being followed, (east, north): the previous waypoint, or
+# where the rover was when it first went autonomous
+_leg_start = None
+
+def target_heading(e, n, speed, mission, index):
+    """Heading to steer for and the cross-track error (None if not on a leg)."""
+    global _leg_start
+    if _leg_start is None:
+        _leg_start = (e, n)
+    be = mission.east[index]
+    bn = mission.north[index]
+    leg = stanley_heading(e, n, speed, _leg_start[0], _leg_start[1], be, bn,
+                          STANLEY_K, STANLEY_MIN_SPEED)
+    if leg is None:
+        # Past the end of the leg (or no leg): go straight for the waypoint
+        return distance_bearing(e, n, be, bn)[1], None
+    return leg
+
+# Navigation is only recomputed when position/course or the target changes
+# (GSA/GST sentences leave nav_seq alone)
+_nav_key = None
+_nav_angle = 0
+_was_auto = False
+
 def update():
-    read_rc_inputs()
+    global _nav_key, _nav_angle, _was_auto, _leg_start, _hold_start
+    request = system_state.mission_request
+    if request is not None and request is not system_state.waypoints:
+        install_mission(request)
+    rc_ok = read_rc_inputs()
     
     steer_in = rc_inputs["steering"]
     mode_in = rc_inputs["mode"]
     
-    if mode_in > AUTO_THRESHOLD:
+    if not rc_ok:
+        angle = 0  # failsafe: wheels straight, no autonomous driving
+        mode_in = 1000
+    elif mode_in > AUTO_THRESHOLD and not system_state.wp_count:
+        angle = 0  # no mission to run
+    elif mode_in > AUTO_THRESHOLD:
+        if not _was_auto:
+            # Fresh start: no stale integral, no hold timed while under RC,
+            # and the leg begins where the rover is now, not where it last
+            # left autonomous mode
+            steer_ctrl.reset()
+            _leg_start = None
+            _nav_key = None
+            _hold_start = None
+            system_state.nav_holding = False
+            system_state.nav_distance = None  # measured before the RC takeover
         check_waypoint_advance()
-        lat, lon = extract_lat_lon()
-        heading = extract_heading()
-
-        if lat is not None and lon is not None and heading is not None:
-            waypoint = system_state.waypoints[system_state.current_waypoint_index]
-            target_lat, target_lon = waypoint
-
-            distance = approx_distance(lat, lon, target_lat, target_lon)
-            target_bearing = calculate_bearing(lat, lon, target_lat, target_lon)
-
-            heading_error = (target_bearing - heading + 540) % 360 - 180  # Normalize to [-180, 180]
-
-            # For now, use heading error directly as "distance" input to PID
-            angle = steering_pid(heading_error, 0, heading_error, 0)
+        fix = system_state.gps_data
+        lat = fix.lat
+        lon = fix.lon
+        heading = fix.heading
+        key = (fix.nav_seq, system_state.current_waypoint_index)
+
+        if system_state.nav_holding:
+            angle = 0  # waiting out the hold time
+            system_state.nav_target_speed = 0.0
+            _nav_key = None
+        elif key == _nav_key:
+            angle = _nav_angle
+        elif lat is not None and lon is not None and heading is not None:
+            mission = system_state.waypoints
+            index = system_state.current_waypoint_index
+            # Planar maths in the mission's own east/north frame
+            e, n = mission.frame.to_enu(lat, lon)
+            de = mission.east[index] - e
+            dn = mission.north[index] - n
+            distance = math.sqrt(de * de + dn * dn)
+            target_bearing, cross_track = target_heading(e, n, fix.speed, mission, index)
+            heading_error = wrap180(target_bearing - heading)
+
+            # Timed by the GGA that started this epoch: the epoch's later
+            # sentences re-evaluate it rather than taking ~20 ms steps
+            angle = steer_ctrl.update(heading_error, fix.last_update_ticks)
             system_state.nav_distance = distance
             system_state.nav_heading_error = heading_error
+            system_state.nav_cross_track = cross_track
+            system_state.nav_target_speed = mission.speed_ms(index)
             #print("distance: ", distance)
             #print("heading: ", heading_error)
-            system_state.display_lines[9] = f"WP: {system_state.current_waypoint_index}"
+            _nav_key = key
+            _nav_angle = angle
         else:
             angle = 0  # fallback
     else:
         angle = map_range(steer_in, FULL_LEFT, FULL_RIGHT, -30, 30)
-        system_state.display_lines[10] = "RC"
-        
+
+    _was_auto = rc_ok and mode_in > AUTO_THRESHOLD
+    if not _was_auto:
+        system_state.nav_holding = False  # not holding anywhere while under RC
+    system_state.nav_auto = mode_in > AUTO_THRESHOLD
+    system_state.nav_steer_angle = angle
+    system_state.nav_steer_us = steer_in
+    system_state.nav_mode_us = mode_in
+
     if system_state.steering_enabled:
         set_steering_angle(angle)
 
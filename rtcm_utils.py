@@ -0,0 +1,142 @@
+# rtcm_utils.py
+# RTCM3 framer for the NTRIP -> GPS path. Bytes from the caster arrive in
+# arbitrary chunks; only complete frames with a valid CRC24Q are forwarded,
+# so the receiver never sees a split or corrupted message.
+#
+# Frame: 0xD3 | 6 reserved bits + 10 bit length | payload | CRC24Q (3 bytes)
+from array import array
+import time
+
+MAX_PAYLOAD = 1023
+MAX_FRAME = MAX_PAYLOAD + 6
+_POLY = 0x1864CFB
+
+
+def _make_table():
+    table = array('I', [0] * 256)
+    for i in range(256):
+        crc = i << 16
+        for _ in range(8):
+            crc <<= 1
+            if crc & 0x1000000:
+                crc ^= _POLY
+        table[i] = crc & 0xFFFFFF
+    return table
+
+_TABLE = _make_table()
+
+
+def crc24q(buf, start, end):
+    crc = 0
+    table = _TABLE
+    for i in range(start, end):
+        crc = ((crc << 8) & 0xFFFFFF) ^ table[(crc >> 16) ^ buf[i]]
+    return crc
+
+
+class RtcmFramer:
+    def __init__(self, out, size=2 * MAX_FRAME):
+        self.out = out              # called with a memoryview of each valid frame
+        self.buf = bytearray(size)
+        self.mv = memoryview(self.buf)
+        self.n = 0                  # bytes buffered
+        self.frames = 0
+        self.crc_errors = 0
+        self.junk_bytes = 0         # bytes skipped while hunting for a frame
+        self.bytes_forwarded = 0
+        self.msg_counts = {}        # message type -> frames
+        self.last_frame_ticks = None
+        self.bytes_per_s = 0
+        self._rate_bytes = 0
+        self._rate_ticks = time.ticks_ms()
+
+    def feed(self, data):
+        """Buffer a chunk from the caster and forward every complete frame."""
+        src = memoryview(data)
+        i = 0
+        total = len(data)
+        while i < total:
+            k = len(self.buf) - self.n
+            if k > total - i:
+                k = total - i
+            self.mv[self.n:self.n + k] = src[i:i + k]
+            self.n += k
+            i += k
+            self._scan()
+        self._update_rate()
+
+    def _scan(self):
+        buf = self.buf
+        n = self.n
+        pos = 0
+        while pos < n:
+            p = buf.find(b'\xd3', pos, n)
+            if p < 0:
+                self.junk_bytes += n - pos
+                pos = n
+                break
+            self.junk_bytes += p - pos
+            pos = p
+            if n - pos < 3:
+                break
+            if buf[pos + 1] & 0xFC:  # reserved bits must be zero
+                self.junk_bytes += 1
+                pos += 1
+                continue
+            length = ((buf[pos + 1] & 0x03) << 8) | buf[pos + 2]
+            size = length + 6
+            if n - pos < size:
+                break
+            end = pos + 3 + length
+            if crc24q(buf, pos, end) == (buf[end] << 16) | (buf[end + 1] << 8) | buf[end + 2]:
+                self._frame(pos, size, length)
+                pos += size
+            else:
+                # false preamble or corrupted frame: resync one byte later
+                self.crc_errors += 1
+                self.junk_bytes += 1
+                pos += 1
+        if pos:
+            left = n - pos
+            if left:
+                self.mv[0:left] = self.mv[pos:n]
+            self.n = left
+        elif n == len(buf):
+            # cannot happen with a 2-frame buffer, but never wedge
+            self.junk_bytes += n
+            self.n = 0
+
+    def _frame(self, pos, size, length):
+        if length >= 2:
+            msg = (self.buf[pos + 3] << 4) | (self.buf[pos + 4] >> 4)
+            self.msg_counts[msg] = self.msg_counts.get(msg, 0) + 1
+        self.frames += 1
+        self.bytes_forwarded += size
+        self._rate_bytes += size
+        self.last_frame_ticks = time.ticks_ms()
+        self.out(self.mv[pos:pos + size])
+
+    def _update_rate(self):
+        now = time.ticks_ms()
+        dt = time.ticks_diff(now, self._rate_ticks)
+        if dt >= 1000:
+            self.bytes_per_s = self._rate_bytes * 1000 // dt
+            self._rate_bytes = 0
+            self._rate_ticks = now
+
+    def age_ms(self):
+        """Milliseconds since the last valid frame, or None."""
+        if self.last_frame_ticks is None:
+            return None
+        return time.ticks_diff(time.ticks_ms(), self.last_frame_ticks)
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "crc_errors": self.crc_errors,
+            "junk_bytes": self.junk_bytes,
+            "bytes_forwarded": self.bytes_forwarded,
+            "bytes_per_s": self.bytes_per_s,
+            "age_ms": self.age_ms(),
+            "msgs": self.msg_counts,
+        }
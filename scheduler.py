@@ -0,0 +1,102 @@
+# scheduler.py
+# Cooperative fixed-rate task scheduler for the main loop.
+#
+# Each task has a period and a priority. Whenever a task finishes, the
+# scheduler picks the highest-priority task that is due, so a slow
+# low-priority task (display, network) delays a high-priority one (control)
+# by at most its own run time, never by a whole loop of everything else.
+import time
+import metrics
+
+
+class Task:
+    __slots__ = ("name", "fn", "period_ms", "priority", "next_ticks",
+                 "runs", "overruns", "late_max_ms", "timing")
+
+    def __init__(self, name, fn, period_ms, priority, stage=None):
+        self.name = name
+        self.fn = fn
+        self.period_ms = period_ms
+        self.priority = priority
+        self.next_ticks = time.ticks_ms()
+        self.runs = 0
+        self.overruns = 0      # started a full period late, or ran longer than its period
+        self.late_max_ms = 0   # worst start time past the deadline
+        self.timing = metrics.stage(stage or name)  # run time, shown on /metrics
+
+    def stats(self):
+        return {
+            "period_ms": self.period_ms,
+            "priority": self.priority,
+            "runs": self.runs,
+            "overruns": self.overruns,
+            "late_max_ms": self.late_max_ms,
+            "run_max_us": self.timing.max_us,
+            "run_avg_us": self.timing.mean_us(),
+        }
+
+
+class Scheduler:
+    def __init__(self, idle_ms=2):
+        self.tasks = []        # highest priority first
+        self.idle_ms = idle_ms
+        self.running = False
+
+    def add(self, name, fn, period_ms, priority=0, stage=None):
+        task = Task(name, fn, period_ms, priority, stage)
+        self.tasks.append(task)
+        self.tasks.sort(key=lambda t: -t.priority)
+        return task
+
+    def run_once(self):
+        """Run the highest-priority due task. Returns False if none was due."""
+        now = time.ticks_ms()
+        for task in self.tasks:
+            late = time.ticks_diff(now, task.next_ticks)
+            if late >= 0:
+                self._run(task, now, late)
+                return True
+        return False
+
+    def _run(self, task, now, late):
+        t0 = time.ticks_us()
+        try:
+            task.fn()
+        except Exception as e:
+            print("Task", task.name, "error:", e)
+        run_us = time.ticks_diff(time.ticks_us(), t0)
+        task.runs += 1
+        task.timing.record(run_us)
+        if late > task.late_max_ms:
+            task.late_max_ms = late
+        period = task.period_ms
+        if late >= period or run_us > period * 1000:
+            task.overruns += 1
+        if late >= period:
+            # Missed a whole period: skip ahead rather than run back-to-back
+            task.next_ticks = time.ticks_add(now, period)
+        else:
+            task.next_ticks = time.ticks_add(task.next_ticks, period)
+
+    def _idle(self):
+        # Sleep until the next deadline, capped so IRQ-fed work stays fresh
+        now = time.ticks_ms()
+        wait = self.idle_ms
+        for task in self.tasks:
+            d = time.ticks_diff(task.next_ticks, now)
+            if d < wait:
+                wait = d
+        if wait > 0:
+            time.sleep_ms(wait)
+
+    def run(self):
+        self.running = True
+        while self.running:
+            if not self.run_once():
+                self._idle()
+
+    def stop(self):
+        self.running = False
+
+    def stats(self):
+        return {task.name: task.stats() for task in self.tasks}
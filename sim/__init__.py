@@ -0,0 +1,55 @@
+# sim
+# Host-side (CPython) simulation of the rover.
+#
+#   import sim
+#   clock = sim.install()        # stand-ins + virtual clock, before any rover import
+#   import gps_utils, rover_control ...
+#
+# install() puts stand-ins for machine, network, framebuf, vga2_8x16,
+# micropython, ubinascii and _thread into sys.modules and adds the
+# MicroPython time.ticks_* / sleep_ms functions to the host's time module,
+# backed by a VirtualClock (or the host clock with realtime=True, for
+# benchmarks). sim.world builds a complete run: vehicle model, GNSS and RC
+# generators and an NTRIP caster around the real main.py; `python -m sim`
+# runs it.
+import binascii
+import builtins
+import os
+import sys
+import time
+
+from sim.clock import VirtualClock, RealClock, StopSimulation, TICKS_PERIOD  # noqa: F401
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_TIME_NAMES = ("ticks_ms", "ticks_us", "ticks_cpu", "ticks_diff", "ticks_add",
+               "sleep_ms", "sleep_us", "sleep", "time")
+
+clock = None
+
+
+def install(clock_=None, realtime=False):
+    """Make the firmware importable on the host. Returns the clock in use."""
+    global clock
+    from sim import machine, network, framebuf, vga2_8x16, micropython
+    from sim import _thread as thread
+    if clock_ is None:
+        clock_ = RealClock() if realtime else VirtualClock()
+    clock = clock_
+    for name in _TIME_NAMES:
+        setattr(time, name, getattr(clock_, name))
+    thread.clock = clock_ if isinstance(clock_, VirtualClock) else None
+    sys.modules.update({
+        "machine": machine,
+        "network": network,
+        "framebuf": framebuf,
+        "vga2_8x16": vga2_8x16,
+        "micropython": micropython,
+        "ubinascii": binascii,
+        "_thread": thread,
+    })
+    for name in ("ptr8", "ptr16", "ptr32"):
+        setattr(builtins, name, getattr(micropython, name))
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    return clock_
@@ -0,0 +1,21 @@
+# sim/_thread.py
+# Stand-in for MicroPython's _thread. The host's own _thread functions are
+# passed through, except that starting a Scheduler's run() (the second-core
+# loop in main.py) hands the scheduler to the virtual clock instead, which
+# services it every simulated millisecond while the main loop sleeps. That
+# keeps both "cores" on one host thread and one clock.
+import _thread as _host
+
+# Everything the host module has (threading uses the _private names too)
+globals().update({k: getattr(_host, k) for k in dir(_host) if not k.startswith("__")})
+
+clock = None   # set by sim.install() when the clock is virtual
+
+
+def start_new_thread(function, args, kwargs=None):
+    owner = getattr(function, "__self__", None)
+    if clock is not None and getattr(function, "__name__", "") == "run" and hasattr(owner, "run_once"):
+        owner.running = True
+        clock.add_core(owner)
+        return id(owner)
+    return _host.start_new_thread(function, args, kwargs or {})
@@ -0,0 +1,99 @@
+# sim/caster.py
+# Mock NTRIP caster on a loopback TCP port. It is stepped from the virtual
+# clock rather than a thread: poll() accepts clients and answers their GET,
+# and every period it sends each streaming client one RTCM3 frame
+# (a 1005 base station message with a valid CRC-24Q).
+import socket
+
+from rtcm_utils import crc24q
+
+
+def rtcm_frame(msg_type, payload=b""):
+    body = bytes(((msg_type >> 4) & 0xFF, (msg_type & 0x0F) << 4)) + payload
+    frame = bytearray(b"\xd3" + bytes(((len(body) >> 8) & 0x03, len(body) & 0xFF)) + body + b"\0\0\0")
+    crc = crc24q(frame, 0, len(frame) - 3)
+    frame[-3:] = bytes(((crc >> 16) & 0xFF, (crc >> 8) & 0xFF, crc & 0xFF))
+    return bytes(frame)
+
+
+BASE_1005 = rtcm_frame(1005, bytes(17))
+
+
+class MockCaster:
+    def __init__(self, clock, mountpoint="SIM", port=0, period_us=1000000):
+        self.mountpoint = mountpoint
+        self.server = socket.socket()
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind(("127.0.0.1", port))
+        self.server.listen(2)
+        self.server.setblocking(False)
+        self.port = self.server.getsockname()[1]
+        self.clients = []          # [sock, request bytes so far, streaming]
+        self.connections = 0
+        self.frames_sent = 0
+        self.online = True         # False = refuse to stream (simulated outage)
+        # Status reply; NTRIP v1 casters may send "ICY 200 OK\r\n" with no
+        # blank line. The first frame goes out with it, as real casters do.
+        self.reply = b"ICY 200 OK\r\n\r\n"
+        clock.every(20000, self.poll)
+        clock.every(period_us, self.broadcast)
+
+    def poll(self):
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except BlockingIOError:
+                break
+            conn.setblocking(False)
+            self.clients.append([conn, b"", False])
+            self.connections += 1
+        for c in list(self.clients):
+            if c[2]:
+                continue
+            try:
+                data = c[0].recv(1024)
+            except BlockingIOError:
+                continue
+            except OSError:
+                data = b""
+            if not data:
+                self._drop(c)
+                continue
+            c[1] += data
+            if b"\r\n\r\n" in c[1]:
+                ok = self.online and c[1].startswith(("GET /%s " % self.mountpoint).encode())
+                try:
+                    c[0].send(self.reply + BASE_1005 if ok else b"HTTP/1.0 401 Unauthorized\r\n\r\n")
+                except OSError:
+                    pass
+                if ok:
+                    c[2] = True
+                    self.frames_sent += 1
+                else:
+                    self._drop(c)
+
+    def broadcast(self):
+        for c in list(self.clients):
+            if not c[2]:
+                continue
+            try:
+                c[0].send(BASE_1005)
+                self.frames_sent += 1
+            except OSError:
+                self._drop(c)
+
+    def drop_all(self):
+        """Close every client connection (the rover should reconnect)."""
+        for c in list(self.clients):
+            self._drop(c)
+
+    def _drop(self, c):
+        try:
+            c[0].close()
+        except OSError:
+            pass
+        self.clients.remove(c)
+
+    def close(self):
+        self.drop_all()
+        self.server.close()
@@ -0,0 +1,155 @@
+# sim/clock.py
+# Clocks behind the time.ticks_* shim.
+#
+# VirtualClock only moves when the code sleeps, so a loop that idles most
+# of the time runs as fast as the host can execute its busy parts. Events
+# (the vehicle model, NMEA output, RC edges, the caster) are scheduled on
+# it in microseconds and fire in order while time advances. Schedulers
+# started "on core 1" through the _thread stand-in are serviced every
+# simulated millisecond while the main loop sleeps.
+import heapq
+import time as _time
+
+TICKS_PERIOD = 1 << 30          # MicroPython's ticks wrap here
+_TICKS_HALF = TICKS_PERIOD // 2
+EPOCH = 1767225600              # time.time() at start: 2026-01-01 00:00:00 UTC
+
+# The shim replaces these on the time module; keep the host's own
+_perf_ns = _time.perf_counter_ns
+_host_sleep = _time.sleep
+_host_time = _time.time
+
+
+class StopSimulation(BaseException):
+    """Raised out of a sleep when the run time is up. Not an Exception, so
+    the scheduler's per-task error handling does not swallow it."""
+
+
+def ticks_diff(a, b):
+    d = (a - b) & (TICKS_PERIOD - 1)
+    return d - TICKS_PERIOD if d >= _TICKS_HALF else d
+
+
+def ticks_add(t, delta):
+    return (t + delta) % TICKS_PERIOD
+
+
+class VirtualClock:
+    def __init__(self, start_ms=0, epoch=EPOCH):
+        # start_ms close to TICKS_PERIOD exercises tick wrap-around early
+        self.now_us = start_ms * 1000
+        self.epoch = epoch
+        self.stop_us = None
+        self._events = []
+        self._seq = 0
+        self._cores = []
+        self._in_core = False
+
+    # -- time module surface ---------------------------------------------------
+    def ticks_us(self):
+        return self.now_us % TICKS_PERIOD
+
+    def ticks_ms(self):
+        return (self.now_us // 1000) % TICKS_PERIOD
+
+    ticks_cpu = ticks_us
+    ticks_diff = staticmethod(ticks_diff)
+    ticks_add = staticmethod(ticks_add)
+
+    def time(self):
+        return self.epoch + self.now_us // 1000000
+
+    def sleep_us(self, us):
+        self.advance(int(us))
+
+    def sleep_ms(self, ms):
+        self.advance(int(ms) * 1000)
+
+    def sleep(self, s):
+        self.advance(int(s * 1000000))
+
+    # -- simulation ------------------------------------------------------------
+    def run_for(self, seconds):
+        """Make the first sleep after `seconds` more raise StopSimulation."""
+        self.stop_us = self.now_us + int(seconds * 1000000)
+
+    def at(self, t_us, fn):
+        self._seq += 1
+        heapq.heappush(self._events, (t_us, self._seq, fn))
+
+    def after(self, delay_us, fn):
+        self.at(self.now_us + delay_us, fn)
+
+    def every(self, period_us, fn, phase_us=0):
+        """Call fn() every period_us, first after phase_us."""
+        def tick():
+            fn()
+            self.after(period_us, tick)
+        self.after(phase_us, tick)
+
+    def add_core(self, sched):
+        """Service sched.run_once() every simulated ms while others sleep."""
+        self._cores.append(sched)
+
+    def advance(self, us):
+        target = self.now_us + max(0, us)
+        while True:
+            nxt = target
+            if self._events and self._events[0][0] < nxt:
+                nxt = self._events[0][0]
+            if self._cores and not self._in_core:
+                boundary = (self.now_us // 1000 + 1) * 1000
+                if boundary < nxt:
+                    nxt = boundary
+            if nxt > self.now_us:
+                self.now_us = nxt
+            if self.stop_us is not None and self.now_us >= self.stop_us:
+                raise StopSimulation()
+            events = self._events
+            while events and events[0][0] <= self.now_us:
+                heapq.heappop(events)[2]()
+            self._run_cores()
+            if self.now_us >= target:
+                return
+
+    def _run_cores(self):
+        if self._in_core:
+            return
+        self._in_core = True
+        try:
+            for sched in self._cores:
+                if not getattr(sched, "running", True):
+                    continue
+                for _ in range(100):
+                    if not sched.run_once():
+                        break
+        finally:
+            self._in_core = False
+
+
+class RealClock:
+    """Same surface on the host's own clock, for benchmarks."""
+    def __init__(self):
+        self._t0 = _perf_ns()
+
+    def ticks_us(self):
+        return ((_perf_ns() - self._t0) // 1000) % TICKS_PERIOD
+
+    def ticks_ms(self):
+        return ((_perf_ns() - self._t0) // 1000000) % TICKS_PERIOD
+
+    ticks_cpu = ticks_us
+    ticks_diff = staticmethod(ticks_diff)
+    ticks_add = staticmethod(ticks_add)
+
+    def time(self):
+        return int(_host_time())
+
+    def sleep_us(self, us):
+        _host_sleep(us / 1e6)
+
+    def sleep_ms(self, ms):
+        _host_sleep(ms / 1e3)
+
+    def sleep(self, s):
+        _host_sleep(s)
@@ -0,0 +1,185 @@
+# sim/framebuf.py
+# Pure-Python stand-in for MicroPython's framebuf, byte-compatible for the
+# formats the display code uses: RGB565 (little-endian 16-bit words, as on
+# the RP2040), MONO_HLSB, MONO_VLSB and GS8. text() draws 8x8 glyphs
+# taken from the sim font, not the firmware's built-in font.
+
+MONO_VLSB = 0
+RGB565 = 1
+GS4_HMSB = 2
+MONO_HLSB = 3
+MONO_HMSB = 4
+GS2_HMSB = 5
+GS8 = 6
+MVLSB = MONO_VLSB
+
+
+class FrameBuffer:
+    def __init__(self, buffer, width, height, format, stride=None):
+        if format not in (RGB565, MONO_HLSB, MONO_VLSB, GS8):
+            raise ValueError("format not supported by the sim")
+        self.buf = memoryview(buffer).cast("B")
+        self.width = width
+        self.height = height
+        self.format = format
+        self.stride = width if stride is None else stride
+        if format == MONO_HLSB:
+            self.stride = (self.stride + 7) & ~7  # whole bytes per row
+
+    # -- raw pixel access --------------------------------------------------------
+    def _get(self, x, y):
+        f = self.format
+        b = self.buf
+        if f == RGB565:
+            i = 2 * (y * self.stride + x)
+            return b[i] | (b[i + 1] << 8)
+        if f == MONO_HLSB:
+            i = (y * self.stride + x) >> 3
+            return (b[i] >> (7 - (x & 7))) & 1
+        if f == MONO_VLSB:
+            return (b[(y >> 3) * self.stride + x] >> (y & 7)) & 1
+        return b[y * self.stride + x]
+
+    def _set(self, x, y, c):
+        f = self.format
+        b = self.buf
+        if f == RGB565:
+            i = 2 * (y * self.stride + x)
+            b[i] = c & 0xFF
+            b[i + 1] = (c >> 8) & 0xFF
+        elif f == MONO_HLSB:
+            i = (y * self.stride + x) >> 3
+            bit = 0x80 >> (x & 7)
+            b[i] = (b[i] | bit) if c & 1 else (b[i] & ~bit & 0xFF)
+        elif f == MONO_VLSB:
+            i = (y >> 3) * self.stride + x
+            bit = 1 << (y & 7)
+            b[i] = (b[i] | bit) if c & 1 else (b[i] & ~bit & 0xFF)
+        else:
+            b[y * self.stride + x] = c & 0xFF
+
+    # -- drawing -------------------------------------------------------------------
+    def pixel(self, x, y, c=None):
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+        if c is None:
+            return self._get(x, y)
+        self._set(x, y, c)
+
+    def fill_rect(self, x, y, w, h, c):
+        x0 = max(x, 0)
+        y0 = max(y, 0)
+        x1 = min(x + w, self.width)
+        y1 = min(y + h, self.height)
+        if x0 >= x1 or y0 >= y1:
+            return
+        if self.format == RGB565 and self.stride == self.width:
+            row = bytes((c & 0xFF, (c >> 8) & 0xFF)) * (x1 - x0)
+            for yy in range(y0, y1):
+                i = 2 * (yy * self.stride + x0)
+                self.buf[i:i + len(row)] = row
+            return
+        for yy in range(y0, y1):
+            for xx in range(x0, x1):
+                self._set(xx, yy, c)
+
+    def fill(self, c):
+        self.fill_rect(0, 0, self.width, self.height, c)
+
+    def hline(self, x, y, w, c):
+        self.fill_rect(x, y, w, 1, c)
+
+    def vline(self, x, y, h, c):
+        self.fill_rect(x, y, 1, h, c)
+
+    def rect(self, x, y, w, h, c, f=False):
+        if f:
+            self.fill_rect(x, y, w, h, c)
+            return
+        self.hline(x, y, w, c)
+        self.hline(x, y + h - 1, w, c)
+        self.vline(x, y, h, c)
+        self.vline(x + w - 1, y, h, c)
+
+    def line(self, x0, y0, x1, y1, c):
+        dx = abs(x1 - x0)
+        dy = -abs(y1 - y0)
+        sx = 1 if x0 < x1 else -1
+        sy = 1 if y0 < y1 else -1
+        err = dx + dy
+        while True:
+            self.pixel(x0, y0, c)
+            if x0 == x1 and y0 == y1:
+                return
+            e2 = 2 * err
+            if e2 >= dy:
+                err += dy
+                x0 += sx
+            if e2 <= dx:
+                err += dx
+                y0 += sy
+
+    def scroll(self, dx, dy):
+        w, h = self.width, self.height
+        src = [[self._get(x, y) for x in range(w)] for y in range(h)]
+        for y in range(h):
+            for x in range(w):
+                sx, sy = x - dx, y - dy
+                if 0 <= sx < w and 0 <= sy < h:
+                    self._set(x, y, src[sy][sx])
+
+    def blit(self, fbuf, x, y, key=-1, palette=None):
+        if isinstance(fbuf, tuple):
+            fbuf = FrameBuffer(*fbuf)
+        if (fbuf.format == MONO_HLSB and palette is not None and self.format == RGB565
+                and self.stride == self.width):
+            self._blit_mono(fbuf, x, y, key, palette)
+            return
+        # Same order as modframebuf.c: palette lookup, then the key test
+        for sy in range(fbuf.height):
+            dy = y + sy
+            if not 0 <= dy < self.height:
+                continue
+            for sx in range(fbuf.width):
+                dx = x + sx
+                if not 0 <= dx < self.width:
+                    continue
+                col = fbuf._get(sx, sy)
+                if palette is not None:
+                    col = palette._get(col, 0)
+                if col != key:
+                    self._set(dx, dy, col)
+
+    def _blit_mono(self, src, x, y, key, palette):
+        # Common case (glyphs through a 2-colour palette), without a call per pixel
+        cols = []
+        for v in (0, 1):
+            c = palette._get(v, 0)
+            cols.append(None if c == key else bytes((c & 0xFF, (c >> 8) & 0xFF)))
+        buf = self.buf
+        sbuf = src.buf
+        row_bytes = src.stride >> 3
+        x0 = max(0, -x)
+        x1 = min(src.width, self.width - x)
+        for sy in range(max(0, -y), min(src.height, self.height - y)):
+            base = 2 * ((y + sy) * self.stride + x)
+            srow = sy * row_bytes
+            for sx in range(x0, x1):
+                c = cols[(sbuf[srow + (sx >> 3)] >> (7 - (sx & 7))) & 1]
+                if c is not None:
+                    i = base + 2 * sx
+                    buf[i:i + 2] = c
+
+    def text(self, s, x, y, c=1):
+        from sim import vga2_8x16 as font
+        for ch in s:
+            code = ord(ch)
+            if code < font.FIRST or code > font.LAST:
+                code = font.FIRST
+            base = (code - font.FIRST) * font.HEIGHT
+            for row in range(8):
+                bits = font.FONT[base + 2 * row + 1]
+                for col in range(8):
+                    if bits & (0x80 >> col):
+                        self.pixel(x + col, y + row, c)
+            x += 8
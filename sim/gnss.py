@@ -0,0 +1,96 @@
+# sim/gnss.py
+# LC29H-like receiver on a sim UART: NMEA (GGA, VTG, RMC, GSA, GST) from a
+# Vehicle at a fixed rate, RTK fixed while RTCM keeps arriving on the same
+# UART, and the PAIR command acknowledgements the boot code waits for.
+import math
+import random
+
+RTK_TIMEOUT_US = 5000000   # quality drops back to plain GPS after this without RTCM
+
+
+def nmea(body):
+    cs = 0
+    for c in body.encode():
+        cs ^= c
+    return ("$%s*%02X\r\n" % (body, cs)).encode()
+
+
+def _coord(value, lat):
+    hemi = ("N" if value >= 0 else "S") if lat else ("E" if value >= 0 else "W")
+    value = abs(value)
+    deg = int(value)
+    minutes = (value - deg) * 60
+    return ("%02d%010.7f" if lat else "%03d%010.7f") % (deg, minutes), hemi
+
+
+class GnssReceiver:
+    def __init__(self, clock, uart, vehicle, rate_hz=10, seed=1,
+                 rtk_sigma=0.01, gps_sigma=0.8):
+        self.clock = clock
+        self.uart = uart
+        self.vehicle = vehicle
+        self.rng = random.Random(seed)
+        self.rtk_sigma = rtk_sigma     # position noise (m, 1 sigma) by fix type
+        self.gps_sigma = gps_sigma
+        self.rtcm_bytes = 0
+        self.rtcm_frames = 0
+        self._last_rtcm_us = None
+        self.sentences = 0
+        self.enabled = True            # False = receiver goes silent
+        self.gst_sigma = None          # reported GST error (m); None = the actual noise
+        self.gst = True                # False = stop sending GST
+        uart.on_write = self._on_write
+        clock.every(1000000 // rate_hz, self._epoch)
+
+    def _on_write(self, data):
+        if data.startswith(b"$PAIR752"):
+            self.uart.inject(nmea("PAIR001,752,0"))
+            return
+        if data[:1] == b"$":
+            return
+        # Anything else is the RTCM the rover forwards from NTRIP, a frame a write
+        self.rtcm_bytes += len(data)
+        if data[0] == 0xD3:
+            self.rtcm_frames += 1
+        self._last_rtcm_us = self.clock.now_us
+
+    def rtk(self):
+        t = self._last_rtcm_us
+        return t is not None and self.clock.now_us - t < RTK_TIMEOUT_US
+
+    def _epoch(self):
+        if not self.enabled:
+            return
+        v = self.vehicle
+        rtk = self.rtk()
+        sigma = self.rtk_sigma if rtk else self.gps_sigma
+        quality = 4 if rtk else 1
+        lat, lon = v.latlon()
+        lat += self.rng.gauss(0, sigma) / 111195.0
+        lon += self.rng.gauss(0, sigma) / (111195.0 * math.cos(math.radians(lat)))
+        course = (v.heading + self.rng.gauss(0, 0.3)) % 360
+        knots = v.speed / 0.514444
+
+        t = self.clock.time()
+        sod = t % 86400
+        frac = (self.clock.now_us // 10000) % 100
+        hms = "%02d%02d%02d.%02d" % (sod // 3600, sod // 60 % 60, sod % 60, frac)
+        lat_s, ns = _coord(lat, True)
+        lon_s, ew = _coord(lon, False)
+        hdop = 0.6 if rtk else 1.2
+        out = (
+            nmea("GNGGA,%s,%s,%s,%s,%s,%d,24,%.2f,85.0,M,45.1,M,%s,0000"
+                 % (hms, lat_s, ns, lon_s, ew, quality, hdop, "1.0" if rtk else ""))
+            + nmea("GNVTG,%.2f,T,,M,%.3f,N,%.3f,K,%s"
+                   % (course, knots, v.speed * 3.6, "D" if rtk else "A"))
+            + nmea("GNRMC,%s,A,%s,%s,%s,%s,%.3f,%.2f,010126,,,%s,V"
+                   % (hms, lat_s, ns, lon_s, ew, knots, course, "R" if rtk else "A"))
+            + nmea("GNGSA,A,3,01,02,03,04,05,06,07,08,09,10,11,12,%.2f,%.2f,%.2f,1"
+                   % (hdop * 1.6, hdop, hdop * 1.3))
+        )
+        self.sentences += 4
+        if self.gst:
+            err = sigma if self.gst_sigma is None else self.gst_sigma
+            out += nmea("GNGST,%s,1.0,0.5,0.3,45.0,%.3f,%.3f,%.3f" % (hms, err, err, err * 2))
+            self.sentences += 1
+        self.uart.inject(out)
@@ -0,0 +1,196 @@
+# sim/machine.py
+# Stand-in for MicroPython's machine module: the parts the rover uses.
+# Pins, PWM slices and UARTs are registered by number so the simulated
+# world can drive inputs and read outputs from outside the firmware code.
+
+
+class Pin:
+    IN = 0
+    OUT = 1
+    OPEN_DRAIN = 2
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+
+    _levels = {}     # pin number -> level, shared by every Pin object on it
+    _handlers = {}   # pin number -> (handler, trigger, Pin)
+
+    def __init__(self, id, mode=-1, pull=-1, value=None):
+        if isinstance(id, Pin):
+            id = id.id
+        self.id = id
+        if id not in Pin._levels:
+            Pin._levels[id] = 1 if pull == Pin.PULL_UP else 0
+        if value is not None:
+            Pin._levels[id] = 1 if value else 0
+
+    def value(self, v=None):
+        if v is None:
+            return Pin._levels[self.id]
+        Pin._levels[self.id] = 1 if v else 0
+
+    __call__ = value
+
+    def on(self):
+        self.value(1)
+
+    def off(self):
+        self.value(0)
+
+    def toggle(self):
+        self.value(not self.value())
+
+    def irq(self, handler=None, trigger=IRQ_FALLING | IRQ_RISING, hard=False):
+        if handler is None:
+            Pin._handlers.pop(self.id, None)
+        else:
+            Pin._handlers[self.id] = (handler, trigger, self)
+
+    @classmethod
+    def drive(cls, id, level):
+        """Set an input from the outside, firing its IRQ on an edge."""
+        level = 1 if level else 0
+        old = cls._levels.get(id, 0)
+        cls._levels[id] = level
+        h = cls._handlers.get(id)
+        if h is not None and level != old:
+            handler, trigger, pin = h
+            if trigger & (cls.IRQ_RISING if level else cls.IRQ_FALLING):
+                handler(pin)
+
+
+class PWM:
+    _by_pin = {}
+
+    def __init__(self, pin, freq=None, duty_u16=None):
+        self.pin = pin.id if isinstance(pin, Pin) else pin
+        self._freq = freq or 0
+        self._duty = duty_u16 or 0
+        self.writes = 0       # duty register writes, to check write-on-change
+        PWM._by_pin[self.pin] = self
+
+    def freq(self, f=None):
+        if f is None:
+            return self._freq
+        self._freq = f
+
+    def duty_u16(self, d=None):
+        if d is None:
+            return self._duty
+        self._duty = d
+        self.writes += 1
+
+    def pulse_us(self):
+        """High time per period, as a servo sees it."""
+        if not self._freq:
+            return 0
+        return self._duty * 1000000 // (self._freq * 65535)
+
+    def deinit(self):
+        PWM._by_pin.pop(self.pin, None)
+
+    @classmethod
+    def on_pin(cls, pin):
+        return cls._by_pin.get(pin)
+
+
+class UART:
+    IRQ_RXIDLE = 4096
+    _by_id = {}
+
+    def __init__(self, id, baudrate=9600, rxbuf=256, **kw):
+        self.id = id
+        self.baudrate = baudrate
+        self.rxbuf = rxbuf
+        self._rx = bytearray()
+        self.lost = 0            # bytes dropped because rxbuf was full
+        self.on_write = None     # world hook: called with every write()
+        self._irq = None
+        UART._by_id[id] = self
+
+    def init(self, *a, **kw):
+        pass
+
+    def any(self):
+        return len(self._rx)
+
+    def read(self, n=-1):
+        if not self._rx:
+            return None
+        if n < 0:
+            n = len(self._rx)
+        data = bytes(self._rx[:n])
+        del self._rx[:n]
+        return data
+
+    def readinto(self, buf, n=-1):
+        if not self._rx:
+            return None
+        if n < 0 or n > len(buf):
+            n = len(buf)
+        n = min(n, len(self._rx))
+        buf[:n] = self._rx[:n]
+        del self._rx[:n]
+        return n
+
+    def readline(self):
+        i = self._rx.find(b"\n")
+        return self.read(len(self._rx) if i < 0 else i + 1)
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode()
+        if self.on_write is not None:
+            self.on_write(bytes(data))
+        return len(data)
+
+    def irq(self, handler=None, trigger=0, hard=False):
+        self._irq = handler
+
+    def inject(self, data):
+        """World side: bytes arriving on RX, then the RX-idle interrupt."""
+        room = self.rxbuf - len(self._rx)
+        if len(data) > room:
+            self.lost += len(data) - room
+            data = data[:room]
+        self._rx += data
+        if self._irq is not None:
+            self._irq(self)
+
+    @classmethod
+    def get(cls, id):
+        return cls._by_id.get(id)
+
+
+class SPI:
+    def __init__(self, id, baudrate=1000000, **kw):
+        self.id = id
+        self.baudrate = baudrate
+        self.bytes_written = 0
+        self.last_write = None
+
+    def write(self, data):
+        self.bytes_written += len(data)
+        self.last_write = data
+
+    def deinit(self):
+        pass
+
+
+_freq = 125000000
+
+
+def freq(f=None):
+    global _freq
+    if f is None:
+        return _freq
+    _freq = f
+
+
+def unique_id():
+    return b"\x53\x49\x4d\x52\x4f\x56\x45\x52"  # "SIMROVER"
+
+
+def reset():
+    raise SystemExit("machine.reset()")
@@ -0,0 +1,53 @@
+# sim/micropython.py
+# Stand-in for the micropython module. The code emitters become no-ops, so
+# @micropython.viper/@native functions run as ordinary Python; the viper
+# pointer casts they use are provided as builtins by sim.install().
+
+
+def const(x):
+    return x
+
+
+def native(fn):
+    return fn
+
+
+viper = native
+
+
+def ptr8(buf):
+    if isinstance(buf, (bytes, bytearray)):
+        return buf  # already indexes as unsigned bytes; skips a memoryview per call
+    return memoryview(buf).cast("B")
+
+
+def ptr16(buf):
+    return memoryview(buf).cast("B").cast("H")
+
+
+def ptr32(buf):
+    return memoryview(buf).cast("B").cast("I")
+
+
+def opt_level(level=None):
+    return 0 if level is None else None
+
+
+def alloc_emergency_exception_buf(size):
+    pass
+
+
+def schedule(fn, arg):
+    fn(arg)
+
+
+def mem_info(verbose=False):
+    print("mem_info: not available in the sim")
+
+
+def heap_lock():
+    return 0
+
+
+def heap_unlock():
+    return 0
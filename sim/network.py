@@ -0,0 +1,68 @@
+# sim/network.py
+# Stand-in for MicroPython's network module: a WLAN that sees the networks
+# in NETWORKS and joins any of them at once, on the host's loopback address.
+STA_IF = 0
+AP_IF = 1
+STAT_IDLE = 0
+STAT_CONNECTING = 1
+STAT_WRONG_PASSWORD = -3
+STAT_NO_AP_FOUND = -2
+STAT_CONNECT_FAIL = -1
+STAT_GOT_IP = 3
+
+NETWORKS = {"SimNet": "simpass"}   # ssid -> password
+IP = "127.0.0.1"
+
+
+class WLAN:
+    def __init__(self, interface=STA_IF):
+        self.interface = interface
+        self._active = False
+        self._ssid = None
+        self._status = STAT_IDLE
+
+    def active(self, on=None):
+        if on is None:
+            return self._active
+        self._active = bool(on)
+        if not on:
+            self.disconnect()
+
+    def scan(self):
+        if not self._active:
+            raise OSError("WLAN not active")
+        # (ssid, bssid, channel, RSSI, security, hidden)
+        return [(ssid.encode(), b"\x02\x00\x00\x00\x00\x01", 6, -42, 3, 0) for ssid in NETWORKS]
+
+    def connect(self, ssid=None, key=None, **kw):
+        if ssid not in NETWORKS:
+            self._status = STAT_NO_AP_FOUND
+        elif NETWORKS[ssid] and NETWORKS[ssid] != key:
+            self._status = STAT_WRONG_PASSWORD
+        else:
+            self._ssid = ssid
+            self._status = STAT_GOT_IP
+
+    def disconnect(self):
+        self._ssid = None
+        self._status = STAT_IDLE
+
+    def isconnected(self):
+        return self._status == STAT_GOT_IP
+
+    def status(self, param=None):
+        if param == "rssi":
+            return -42
+        return self._status
+
+    def ifconfig(self, config=None):
+        if config is None:
+            ip = IP if self.isconnected() else "0.0.0.0"
+            return (ip, "255.255.255.0", "127.0.0.1", "127.0.0.1")
+
+    def config(self, *args, **kw):
+        if args == ("ssid",) or args == ("essid",):
+            return self._ssid
+        if args == ("mac",):
+            return b"\x02\x00\x00\x00\x00\x02"
+        return None
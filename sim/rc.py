@@ -0,0 +1,29 @@
+# sim/rc.py
+# RC receiver outputs: one servo pulse per channel every frame, as pin
+# edges at exact virtual times, so rc_capture's IRQs see real pulse widths.
+from sim.machine import Pin
+
+FRAME_US = 20000   # 50 Hz
+
+
+class RcGenerator:
+    def __init__(self, clock, channels, frame_us=FRAME_US):
+        """channels: {pin number: pulse width in us}"""
+        self.clock = clock
+        self.widths = dict(channels)
+        self.on = True     # False = receiver lost the transmitter, no pulses
+        self.frames = 0
+        for pin in self.widths:
+            Pin.drive(pin, 0)
+        clock.every(frame_us, self._frame)
+
+    def set(self, pin, width_us):
+        self.widths[pin] = width_us
+
+    def _frame(self):
+        if not self.on:
+            return
+        self.frames += 1
+        for pin, width in self.widths.items():
+            Pin.drive(pin, 1)
+            self.clock.after(width, lambda p=pin: Pin.drive(p, 0))
@@ -0,0 +1,49 @@
+# sim/vehicle.py
+# Kinematic bicycle model of the rover, steered by the servo PWM output.
+import math
+
+EARTH_R = 6371000
+
+
+class Vehicle:
+    def __init__(self, lat0, lon0, heading=0.0, speed=1.5, wheelbase=0.35,
+                 max_steer=30.0, steer_rate=300.0):
+        self.lat0 = lat0
+        self.lon0 = lon0
+        self._ky = EARTH_R * math.pi / 180
+        self._kx = self._ky * math.cos(math.radians(lat0))
+        self.east = 0.0            # metres from (lat0, lon0)
+        self.north = 0.0
+        self.heading = heading     # degrees, 0 = north, clockwise
+        self.speed = speed         # m/s; the ESC is not modelled
+        self.wheelbase = wheelbase
+        self.max_steer = max_steer
+        self.steer_rate = steer_rate   # servo slew, deg/s
+        self.steer = 0.0           # actual wheel angle, deg, + = right
+        self.command = 0.0         # angle the servo is driving towards
+        self.odometer = 0.0
+
+    def set_position(self, lat, lon):
+        self.north = (lat - self.lat0) * self._ky
+        self.east = (lon - self.lon0) * self._kx
+
+    def latlon(self):
+        return self.lat0 + self.north / self._ky, self.lon0 + self.east / self._kx
+
+    def servo_pulse(self, pulse_us):
+        """Servo command from the PWM high time (1100..1900 us = -30..+30 deg)."""
+        if pulse_us:
+            angle = (pulse_us - 1500) * 60.0 / 800
+            self.command = max(-self.max_steer, min(self.max_steer, angle))
+
+    def step(self, dt):
+        d = self.command - self.steer
+        lim = self.steer_rate * dt
+        self.steer += max(-lim, min(lim, d))
+        h = math.radians(self.heading)
+        dist = self.speed * dt
+        self.east += dist * math.sin(h)
+        self.north += dist * math.cos(h)
+        self.heading = (self.heading + math.degrees(
+            dist / self.wheelbase * math.tan(math.radians(self.steer)))) % 360
+        self.odometer += dist
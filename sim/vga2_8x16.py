@@ -0,0 +1,18 @@
+# sim/vga2_8x16.py
+# Stand-in for the 8x16 VGA bitmap font module (same layout: WIDTH, HEIGHT,
+# FIRST, LAST and one byte per glyph row in FONT). The glyphs are a made-up
+# but fixed pattern, enough to exercise the text drawing code off-device.
+WIDTH = 8
+HEIGHT = 16
+FIRST = 0x00
+LAST = 0xFF
+
+
+def _glyph_row(code, row):
+    if code in (0x00, 0x20) or row < 2 or row > 13:
+        return 0
+    return (((code * 0x9E37) >> (row % 5)) ^ (code << (row % 3))) & 0x7E
+
+
+_FONT = bytes(_glyph_row(c, r) for c in range(FIRST, LAST + 1) for r in range(HEIGHT))
+FONT = memoryview(_FONT)
@@ -0,0 +1,150 @@
+# sim/world.py
+# A complete simulated rover: the real main.py on a virtual clock, with a
+# vehicle model steered by the servo output, a GNSS receiver on the GPS
+# UART, an RC receiver on the RC pins and an NTRIP caster on loopback.
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+
+import sim
+from sim.clock import VirtualClock, StopSimulation
+
+LAT0 = 51.2000000
+LON0 = -0.1200000
+
+
+def square_mission(lat0=LAT0, lon0=LON0, side=25.0, radius=2.0):
+    """Four corners of a square, clockwise from the south-west corner."""
+    dlat = side / 111195.0
+    dlon = side / (111195.0 * math.cos(math.radians(lat0)))
+    return [(lat0, lon0, radius), (lat0 + dlat, lon0, radius),
+            (lat0 + dlat, lon0 + dlon, radius), (lat0, lon0 + dlon, radius)]
+
+
+class World:
+    def __init__(self, mission=None, workdir=None, speed=1.5, seed=1,
+                 start_ms=0, web_port=8080, config=None):
+        self.clock = sim.install(VirtualClock(start_ms))
+        self._t0_us = self.clock.now_us
+        self.workdir = workdir or tempfile.mkdtemp(prefix="rover-sim-")
+        os.makedirs(self.workdir, exist_ok=True)
+        os.chdir(self.workdir)
+        self.mission = mission or square_mission()
+
+        from sim.caster import MockCaster
+        self.caster = MockCaster(self.clock)
+        self._write_files(config or {})
+
+        # Firmware modules read config.env and create their UART/pins on import
+        import pin_defs
+        import gps_utils
+        import web_server
+        from sim import machine
+        from sim.vehicle import Vehicle
+        from sim.gnss import GnssReceiver
+        from sim.rc import RcGenerator
+
+        # Start 10 m short of the first waypoint, pointing at it
+        lat, lon = self.mission[0][0], self.mission[0][1]
+        self.vehicle = Vehicle(lat, lon, heading=0.0, speed=speed)
+        self.vehicle.north = -10.0
+        self.gnss = GnssReceiver(self.clock, machine.UART.get(1), self.vehicle, seed=seed)
+        self.rc = RcGenerator(self.clock, {pin_defs.RC_STEERING: 1500, pin_defs.RC_MODE: 2000})
+        self._steer_pin = pin_defs.STEER_PWM
+        self._machine = machine
+
+        # main.py serves on port 80; move it somewhere an ordinary user may bind
+        open_server = web_server.open_server
+        web_server.open_server = lambda ip="0.0.0.0", port=80: open_server(ip, web_port)
+
+        self.waypoints_reached = 0
+        self._last_wp = 0
+        self.xte_max = 0.0
+        self._xte_sum = 0.0
+        self._xte_n = 0
+        self.clock.every(10000, self._step_vehicle)
+        self.clock.every(100000, self._observe)
+
+    def _write_files(self, extra):
+        with open("waypoints.csv", "w") as f:
+            for wp in self.mission:
+                f.write(",".join("%.7f" % v if i < 2 else "%g" % v for i, v in enumerate(wp)) + "\n")
+        env = {
+            "WIFI1_SSID": "SimNet", "WIFI1_PASS": "simpass",
+            "NTRIP_HOST": "127.0.0.1", "NTRIP_PORT": str(self.caster.port),
+            "NTRIP_MOUNTPOINT": self.caster.mountpoint,
+            "NTRIP_USERNAME": "sim", "NTRIP_PASSWORD": "sim",
+        }
+        env.update(extra)
+        with open("config.env", "w") as f:
+            for k, v in env.items():
+                f.write("%s=%s\n" % (k, v))
+
+    def _step_vehicle(self):
+        pwm = self._machine.PWM.on_pin(self._steer_pin)
+        if pwm is None or not pwm.writes:
+            return  # parked until the control loop first drives the servo
+        self.vehicle.servo_pulse(pwm.pulse_us())
+        self.vehicle.step(0.01)
+
+    def _observe(self):
+        import system_state
+        wp = system_state.current_waypoint_index
+        if wp != self._last_wp:
+            self.waypoints_reached += 1
+            self._last_wp = wp
+        xte = system_state.nav_cross_track
+        if xte is not None and self.waypoints_reached:
+            # Only legs between waypoints; the run-in from the start is not a leg
+            a = abs(xte)
+            self.xte_max = max(self.xte_max, a)
+            self._xte_sum += a
+            self._xte_n += 1
+
+    def run(self, seconds):
+        """Boot main.py and run it for `seconds` of simulated time."""
+        self.clock.run_for(seconds)
+        wall0 = time.perf_counter()
+        try:
+            if "main" in sys.modules:
+                raise RuntimeError("main.py can only be booted once per process")
+            import main  # noqa: F401  (runs until the clock stops it)
+        except StopSimulation:
+            pass
+        self.wall_s = time.perf_counter() - wall0
+        return self.report()
+
+    def report(self):
+        import gps_utils
+        import system_state
+        import metrics
+        pwm = self._machine.PWM.on_pin(self._steer_pin)
+        sim_s = (self.clock.now_us - self._t0_us) / 1e6
+        return {
+            "sim_s": round(sim_s, 3),
+            "wall_s": round(self.wall_s, 3),
+            "speedup": round(sim_s / self.wall_s, 1) if self.wall_s else None,
+            "odometer_m": round(self.vehicle.odometer, 1),
+            "waypoints_reached": self.waypoints_reached,
+            "xte_max_m": round(self.xte_max, 3),
+            "xte_mean_m": round(self._xte_sum / self._xte_n, 3) if self._xte_n else None,
+            "rtk": self.gnss.rtk(),
+            "ntrip": system_state.ntrip.status() if system_state.ntrip else None,
+            "rtcm_frames_to_receiver": self.gnss.rtcm_frames,
+            "caster_connections": self.caster.connections,
+            "nmea": gps_utils.sentence_stats,
+            "uart_bytes_lost": self._machine.UART.get(1).lost,
+            "steer_pwm_writes": pwm.writes if pwm else 0,
+            "rt_tasks": system_state.rt_scheduler.stats() if system_state.rt_scheduler else None,
+            "stages": {k: v["count"] for k, v in metrics.as_dict()["stages"].items()},
+        }
+
+    def close(self):
+        self.caster.close()
+
+
+def dumps(report):
+    return json.dumps(report, indent=2, sort_keys=True)
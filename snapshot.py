@@ -0,0 +1,83 @@
+# snapshot.py
+# Double-buffered state handoff from the real-time core to the UI core.
+#
+# Protocol (one writer, any number of readers, no lock):
+#   writer:  fill back() -> publish()        publish flips front and bumps seq
+#   reader:  read_into(dst)                  copy front, retry if seq moved
+# The writer only ever writes into the slot that is not front, and it can
+# only start writing into the slot a reader is copying after a publish,
+# which changes seq. A reader whose seq changed during its copy retries, so
+# it always ends up with one complete, consistent snapshot. The writer never
+# waits for a reader.
+from gps_fix import GpsFix
+
+
+class NavState:
+    __slots__ = ("auto", "wp_index", "distance", "heading_error", "cross_track", "holding", "target_speed", "steer_angle", "steer_us", "mode_us")
+
+    def __init__(self):
+        self.auto = False
+        self.wp_index = 0
+        self.distance = None
+        self.heading_error = 0
+        self.cross_track = None
+        self.holding = False
+        self.target_speed = 0.0
+        self.steer_angle = 0
+        self.steer_us = 1500
+        self.mode_us = 1000
+
+    def copy_from(self, other):
+        self.auto = other.auto
+        self.wp_index = other.wp_index
+        self.distance = other.distance
+        self.heading_error = other.heading_error
+        self.cross_track = other.cross_track
+        self.holding = other.holding
+        self.target_speed = other.target_speed
+        self.steer_angle = other.steer_angle
+        self.steer_us = other.steer_us
+        self.mode_us = other.mode_us
+
+
+class StateSlot:
+    __slots__ = ("fix", "nav", "seq")
+
+    def __init__(self):
+        self.fix = GpsFix()
+        self.nav = NavState()
+        self.seq = 0
+
+    def copy_from(self, other):
+        self.fix.copy_from(other.fix)
+        self.nav.copy_from(other.nav)
+        self.seq = other.seq
+
+
+class Snapshot:
+    def __init__(self):
+        self._slots = (StateSlot(), StateSlot())
+        self._front = 0
+        self.seq = 0
+        self.retries = 0   # reader copies that raced a publish
+
+    def back(self):
+        """Slot the writer may fill; never read until publish()."""
+        return self._slots[self._front ^ 1]
+
+    def publish(self):
+        seq = self.seq + 1
+        self._slots[self._front ^ 1].seq = seq
+        self._front ^= 1
+        self.seq = seq
+
+    def read_into(self, dst):
+        """Copy the latest published slot into dst. Returns dst.seq."""
+        # A copy takes well under one publish period, so this ends in a retry
+        # or two even when the writer is busy
+        while True:
+            seq = self.seq
+            dst.copy_from(self._slots[self._front])
+            if self.seq == seq:
+                return dst.seq
+            self.retries += 1
@@ -0,0 +1,104 @@
+# steering.py
+# Heading controller and cross-track path follower for autonomous mode.
+import math
+import time
+
+
+def wrap180(deg):
+    return (deg + 540) % 360 - 180
+
+
+class SteeringController:
+    """
+    PID on heading error (degrees) -> steering angle (degrees). Keeps its
+    state between calls, scales I and D by the time between samples and
+    stops integrating while the output is saturated (anti-windup).
+
+    now_ms is the sample's time. A call with the same now_ms as the last
+    one re-evaluates that sample with a newer error (say its heading came in
+    after its position) without stepping I or D again.
+    """
+    def __init__(self, kp, ki, kd, limit=30, max_dt=1.0):
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.limit = limit
+        self.max_dt = max_dt      # longer gaps restart the I/D history
+        self.reset()
+
+    def reset(self):
+        self.integral = 0.0
+        self.last_error = None
+        self.last_ticks = None
+        self.derivative = 0.0
+        self.output = 0.0
+
+    def update(self, error, now_ms=None):
+        if now_ms is None:
+            now_ms = time.ticks_ms()
+        if now_ms == self.last_ticks:
+            self.last_error = error
+            return self._limit(self.kp * error + self.ki * self.integral + self.kd * self.derivative)
+        dt = 0.0
+        if self.last_ticks is not None:
+            dt = time.ticks_diff(now_ms, self.last_ticks) / 1000
+            if dt > self.max_dt:
+                dt = 0.0
+                self.last_error = None
+        self.last_ticks = now_ms
+
+        derivative = 0.0
+        if dt > 0 and self.last_error is not None:
+            derivative = wrap180(error - self.last_error) / dt
+        self.last_error = error
+        self.derivative = derivative
+
+        p = self.kp * error
+        d = self.kd * derivative
+        out = p + self.ki * self.integral + d
+        # Only integrate when that does not push further into saturation
+        if dt > 0 and self.ki:
+            saturated_high = out >= self.limit and error > 0
+            saturated_low = out <= -self.limit and error < 0
+            if not (saturated_high or saturated_low):
+                self.integral += error * dt
+                i_max = self.limit / self.ki
+                if self.integral > i_max:
+                    self.integral = i_max
+                elif self.integral < -i_max:
+                    self.integral = -i_max
+            out = p + self.ki * self.integral + d
+        return self._limit(out)
+
+    def _limit(self, out):
+        if out > self.limit:
+            out = self.limit
+        elif out < -self.limit:
+            out = -self.limit
+        self.output = out
+        return out
+
+
+def stanley_heading(e, n, speed, ae, an, be, bn, k, min_speed):
+    """
+    Desired heading (deg) to follow the segment A->B from (e, n), all in
+    metres in the mission's east/north frame. Stanley style: the segment's
+    bearing corrected by atan(k * xte / v).
+    Returns (heading, cross_track_m), or None once past B or if A == B,
+    in which case the caller should head straight for B.
+    """
+    dx = be - ae
+    dy = bn - an
+    seg2 = dx * dx + dy * dy
+    if seg2 < 0.01:
+        return None
+    rx = e - ae
+    ry = n - an
+    if (rx * dx + ry * dy) / seg2 > 1:
+        return None
+    seg = math.sqrt(seg2)
+    xte = (dy * rx - dx * ry) / seg  # metres, positive = right of the path
+    path_bearing = math.degrees(math.atan2(dx, dy))
+    v = speed if speed is not None and speed > min_speed else min_speed
+    heading = path_bearing - math.degrees(math.atan2(k * xte, v))
+    return heading % 360, xte
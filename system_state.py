@@ -1,47 +1,129 @@
 import time
+from gps_fix import GpsFix
+from snapshot import Snapshot, StateSlot
+from waypoint_utils import Mission
 display_enabled = False
 logging = False
 log_file = None
 display_lines = [""] * 12
+# Bumped when a line's text changes, per line and in total: the display
+# redraws only lines whose version moved, and nothing if display_version didn't
+display_versions = [0] * 12
+display_version = 0
+# display_utils' refresh counters, shown in /status.json
+display_stats = {"frames": 0, "full": 0, "skipped": 0, "bytes": 0, "flush_waits": 0}
 
 wifi_connected = False
 wifi_ssid = ""
 wifi_ip = ""
 ntrip_connected = False
+ntrip_state = "idle"
+ntrip_reconnects = 0
 last_ntrip_rx_ticks = None  # ticks_ms() of last RTCM/NTRIP data seen
+rtcm = None  # rtcm_utils.RtcmFramer on the NTRIP path, set by main
+ntrip = None  # network_utils.NtripClient, set by main
+scheduler = None  # scheduler.Scheduler on core 0 (UI/network), set by main
+rt_scheduler = None  # scheduler.Scheduler on core 1 (GPS/control), set by main
 
-gps_data = {
-    "time": "",
-    "lat": "",
-    "lon": "",
-    "heading": "",
-    "fix": "",
-    "last_update_ticks": ""
-}
+# Core 1 (real time) owns gps_data and the nav_* values below and publishes
+# them through `shared` after every control tick. Core 0 (UI, web, logging)
+# reads them only through its private copy `view`, refreshed by refresh_view().
+gps_data = GpsFix()
+shared = Snapshot()
+view = StateSlot()
 
 # system_state.py
-waypoints = []
+waypoints = Mission()  # the mission core 1 is running
 wp_count = 0
 current_waypoint_index = 0
+# A new Mission put here (by the web upload) is swapped in by core 1 at the
+# start of its next control tick
+mission_request = None
 nav_distance = None
 nav_heading_error = 0
+nav_holding = False  # waiting out a waypoint's hold time
+nav_target_speed = 0.0  # m/s for the current leg, 0 = not set
+nav_cross_track = None  # metres right of the current leg, None when heading straight for the waypoint
+nav_auto = False
+nav_steer_angle = 0
+nav_steer_us = 1500
+nav_mode_us = 1000
+rc_failsafe = False  # RC signal lost, steering held straight
 steering_enabled = True
-waypoints = []
-current_waypoint_index = 0
+
+def publish_state():
+    """Core 1: hand the current fix and nav state to core 0."""
+    slot = shared.back()
+    slot.fix.copy_from(gps_data)
+    nav = slot.nav
+    nav.auto = nav_auto
+    nav.wp_index = current_waypoint_index
+    nav.distance = nav_distance
+    nav.heading_error = nav_heading_error
+    nav.cross_track = nav_cross_track
+    nav.holding = nav_holding
+    nav.target_speed = nav_target_speed
+    nav.steer_angle = nav_steer_angle
+    nav.steer_us = nav_steer_us
+    nav.mode_us = nav_mode_us
+    shared.publish()
+
+def refresh_view():
+    """Core 0: take the latest published snapshot into view."""
+    return shared.read_into(view)
+
+_UNSET = object()
+_line_source = [_UNSET] * 12  # value each line was last formatted from
+
+def _set_line(i, text):
+    global display_version
+    if display_lines[i] != text:
+        display_lines[i] = text
+        display_versions[i] += 1
+        display_version += 1
+
+def set_display_line(i, text):
+    """Put text on line i; update_display_lines() reformats it on the next change."""
+    _line_source[i] = _UNSET
+    _set_line(i, text)
+
+def _changed(i, value):
+    # True, and remembers value, when line i's source differs from last time
+    if _line_source[i] == value:
+        return False
+    _line_source[i] = value
+    return True
 
 def update_display_lines():
-    display_lines[0] = gps_data.get("lat", "")
-    display_lines[1] = gps_data.get("lon", "")
-    display_lines[2] = gps_data.get("heading", "")
-    display_lines[3] = gps_data.get("fix", "")
-    display_lines[4] = f"GPS UTC: {gps_data.get('time', '')}"
+    """Reformat only the lines whose source values changed."""
+    fix = view.fix
+    if _changed(0, fix.lat):
+        _set_line(0, fix.lat_text())
+    if _changed(1, fix.lon):
+        _set_line(1, fix.lon_text())
+    if _changed(2, fix.heading):
+        _set_line(2, fix.heading_text())
+    if _changed(3, fix.quality):
+        _set_line(3, fix.fix_text())
+    if _changed(4, fix.utc):
+        _set_line(4, f"GPS UTC: {fix.time_text()}")
 
     # Remove old dt line, use the lower lines for connectivity
-    display_lines[5]  = f"WiFi: {'UP' if wifi_connected else 'DOWN'} {wifi_ssid}"
-    display_lines[6] = f"IP: {wifi_ip}" if wifi_connected else "IP: ---"
-    display_lines[7] = f"NTRIP: {'OK' if ntrip_connected else 'NO DATA'}"
-    
-    display_lines[8] = "logging" if logging else ""
+    if _changed(5, (wifi_connected, wifi_ssid)):
+        _set_line(5, f"WiFi: {'UP' if wifi_connected else 'DOWN'} {wifi_ssid}")
+    if _changed(6, (wifi_connected, wifi_ip)):
+        _set_line(6, f"IP: {wifi_ip}" if wifi_connected else "IP: ---")
+    if _changed(7, (ntrip_connected, ntrip_state)):
+        _set_line(7, f"NTRIP: {'OK' if ntrip_connected else ntrip_state.upper()}")
+
+    if _changed(8, logging):
+        _set_line(8, "logging" if logging else "")
+    nav = view.nav
+    if _changed(9, (nav.auto, nav.wp_index, nav.holding)):
+        _set_line(9, f"WP: {nav.wp_index}{' HOLD' if nav.holding else ''}" if nav.auto else "")
+    if _changed(10, nav.auto):
+        _set_line(10, "" if nav.auto else "RC")
+
 
 
 
@@ -0,0 +1,294 @@
+# bench suite
+# Times the hot paths: NMEA parsing, nav maths, the control tick, LCD text
+# and flush, the track GeoJSON and CSV logging. Prints one JSON line of
+# results (microseconds per operation, median of ROUNDS) and compares it with
+# the stored baseline for this platform in "bench baseline.json".
+#
+#   Pico:  mpremote run "tests/bench suite.py"
+#   Host:  python "tests/bench suite.py" [--save] [--tolerance 0.5] [--runs 3] [--only name,...]
+#
+# --save (or SAVE_BASELINE = True on the Pico) writes these results as the
+# new baseline for this platform. Timing uses time.ticks_us on MicroPython
+# and time.perf_counter_ns on CPython. A host shares its CPU with everything
+# else, so there the whole suite runs RUNS times and each benchmark reports
+# its median, and the tolerance is wider; record a host baseline with
+# --runs 7 or more.
+import sys
+import time
+import gc
+
+MICROPYTHON = sys.implementation.name == "micropython"
+PLATFORM = sys.implementation.name + "-" + sys.platform
+BASELINE_FILE = "bench baseline.json"
+ROUNDS = 7
+TOLERANCE = 0.10 if MICROPYTHON else 0.5    # slower than this ratio = regression
+RUNS = 1 if MICROPYTHON else 3                # whole-suite repeats, median taken
+SAVE_BASELINE = False
+ONLY = None
+
+if MICROPYTHON:
+    import json
+    _now_us = time.ticks_us
+    _diff_us = time.ticks_diff
+    _baseline_path = "tests/" + BASELINE_FILE
+else:
+    import json
+    import os
+    import tempfile
+    _here = os.path.dirname(os.path.abspath(__file__))
+    _baseline_path = os.path.join(_here, BASELINE_FILE)
+    sys.path.insert(0, os.path.join(_here, ".."))
+    import sim
+    sim.install(realtime=True)
+    os.chdir(tempfile.mkdtemp(prefix="rover-bench-"))   # log files land here
+    _now_us = lambda: time.perf_counter_ns() / 1000    # noqa: E731
+    _diff_us = lambda a, b: a - b                       # noqa: E731
+
+    args = sys.argv[1:]
+    if "--save" in args:
+        SAVE_BASELINE = True
+    if "--tolerance" in args:
+        TOLERANCE = float(args[args.index("--tolerance") + 1])
+    if "--runs" in args:
+        RUNS = int(args[args.index("--runs") + 1])
+    if "--only" in args:
+        ONLY = args[args.index("--only") + 1].split(",")
+
+
+def _nmea(body):
+    cs = 0
+    for c in body.encode():
+        cs ^= c
+    return ("$%s*%02X\r\n" % (body, cs)).encode()
+
+
+# One 10 Hz epoch as the LC29H sends it
+EPOCH = (
+    _nmea("GNGGA,101530.00,5112.3456789,N,00007.6543210,W,4,24,0.60,85.2,M,45.1,M,1.0,0000")
+    + _nmea("GNVTG,123.45,T,,M,0.52,N,0.96,K,D")
+    + _nmea("GNRMC,101530.00,A,5112.3456789,N,00007.6543210,W,0.52,123.45,010126,,,R,V")
+    + _nmea("GNGSA,A,3,01,02,03,04,05,06,07,08,09,10,11,12,0.96,0.60,0.78,1")
+    + _nmea("GNGST,101530.00,1.0,0.5,0.3,45.0,0.012,0.010,0.025")
+)
+
+
+# -- benchmarks: each setup returns (operation, what one call covers) ---------
+def bench_nmea_epoch():
+    import gps_utils
+    from gps_fix import GpsFix
+    fix = GpsFix()
+    return (lambda: gps_utils.process_buffer(EPOCH, fix)), "5 sentences"
+
+
+def bench_nav_haversine():
+    from gps_utils import approx_distance, calculate_bearing
+    def op():
+        approx_distance(51.2057613, -0.1275720, 51.2059, -0.1273)
+        calculate_bearing(51.2057613, -0.1275720, 51.2059, -0.1273)
+    return op, "distance + bearing"
+
+
+def bench_nav_enu():
+    from waypoint_utils import LocalFrame, distance_bearing
+    frame = LocalFrame(51.2058, -0.1274)
+    def op():
+        e, n = frame.to_enu(51.2057613, -0.1275720)
+        distance_bearing(e, n, 12.5, 8.0)
+    return op, "project + distance + bearing"
+
+
+def bench_control_tick():
+    import rover_control
+    import system_state
+    from waypoint_utils import Mission
+
+    def rc_auto():
+        rover_control.rc_inputs["steering"] = 1500
+        rover_control.rc_inputs["mode"] = 2000
+        system_state.rc_failsafe = False
+        return True
+    rover_control.read_rc_inputs = rc_auto   # RC in auto without a receiver
+
+    m = Mission()
+    m.add(51.2000, -0.1200)
+    m.add(51.2003, -0.1200)
+    system_state.mission_request = m.finish()
+    fix = system_state.gps_data
+    fix.lat = 51.2001
+    fix.lon = -0.1201
+    fix.heading = 10.0
+    fix.speed = 1.0
+    fix.quality = 4
+
+    def op():
+        fix.nav_seq += 1       # a new fix every tick: the full nav path
+        fix.last_update_ticks = time.ticks_add(fix.last_update_ticks or 0, 100)
+        fix.lat += 1e-7
+        rover_control.update()
+    return op, "update() with a new fix"
+
+
+def bench_draw_text():
+    import vga2_8x16 as font
+    from display_utils import lcd
+    return (lambda: lcd.draw_text(font, "Lat: 51.2057613 N   ", 5, 0, 0x0000)), "20 chars"
+
+
+def bench_show():
+    from display_utils import lcd
+    return lcd.show, "full 240x240 frame"
+
+
+def bench_geojson():
+    import gps_utils
+    gps_utils._track.clear()
+    for i in range(500):
+        gps_utils._track.append(51.2 + i * 1e-5, -0.12 + (i % 7) * 1e-5, 1767225600 + i)
+    return (lambda: json.dumps(gps_utils.as_geojson())), "500 points"
+
+
+def bench_csv_log():
+    import logging_utils
+    import system_state
+    from gps_fix import GpsFix
+    fix = GpsFix()
+    fix.lat = 51.2057613
+    fix.lon = -0.1275720
+    fix.heading = 123.45
+    fix.quality = 4
+    fix.utc = 36930
+    logging_utils.start_logging(fix)
+
+    def op():
+        fix.version += 1
+        logging_utils.log_if_needed(fix)
+    return op, "one row"
+
+
+def _stop_logging():
+    import logging_utils
+    import system_state
+    name = None
+    if system_state.log_file is not None:
+        name = getattr(system_state.log_file, "name", None)
+    logging_utils.stop_logging()
+    if name:
+        try:
+            import os
+            os.remove(name)
+        except OSError:
+            pass
+
+
+BENCHES = (
+    # name, setup, calls per round
+    ("nmea.process_buffer", bench_nmea_epoch, 20),
+    ("nav.haversine", bench_nav_haversine, 200),
+    ("nav.enu", bench_nav_enu, 200),
+    ("control.update", bench_control_tick, 50),
+    ("lcd.draw_text", bench_draw_text, 5),
+    ("lcd.show", bench_show, 2),
+    ("track.as_geojson_json", bench_geojson, 3),
+    ("log.csv_row", bench_csv_log, 50),
+)
+
+
+def _time(op, n):
+    times = []
+    for _ in range(ROUNDS):
+        gc.collect()
+        t0 = _now_us()
+        for _ in range(n):
+            op()
+        times.append(_diff_us(_now_us(), t0))
+    times.sort()
+    return times[len(times) // 2] / n   # median round: one noisy round moves nothing
+
+
+def _heap(op):
+    # Bytes allocated by one call (MicroPython only)
+    if not hasattr(gc, "mem_alloc"):
+        return None
+    gc.collect()
+    gc.disable()
+    a = gc.mem_alloc()
+    op()
+    b = gc.mem_alloc()
+    gc.enable()
+    return b - a
+
+
+def run():
+    results = {}
+    for name, setup, n in BENCHES:
+        if ONLY and name not in ONLY:
+            continue
+        try:
+            op, unit = setup()
+            op()  # warm up: first-call imports and caches
+            results[name] = {"us": round(_time(op, n), 2), "per": unit}
+            heap = _heap(op)
+            if heap is not None:
+                results[name]["heap_bytes"] = heap
+        except Exception as e:
+            results[name] = {"error": str(e)}
+        if name == "log.csv_row":
+            _stop_logging()
+    return results
+
+
+def load_baseline():
+    try:
+        with open(_baseline_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def compare(results, baseline):
+    regressions = 0
+    print("%-24s %12s %12s %8s" % ("benchmark", "us", "baseline", "ratio"))
+    for name, r in results.items():
+        if "error" in r:
+            print("%-24s error: %s" % (name, r["error"]))
+            regressions += 1
+            continue
+        base = baseline.get(name, {}).get("us")
+        if base:
+            ratio = r["us"] / base
+            flag = "  SLOWER" if ratio > 1 + TOLERANCE else ("  faster" if ratio < 1 - TOLERANCE else "")
+            if flag == "  SLOWER":
+                regressions += 1
+            print("%-24s %12.2f %12.2f %7.2fx%s" % (name, r["us"], base, ratio, flag))
+        else:
+            print("%-24s %12.2f %12s" % (name, r["us"], "-"))
+    return regressions
+
+
+def median_of(runs):
+    # Per benchmark: the run with the median time (errors only if every run failed)
+    results = {}
+    for name in runs[0]:
+        ok = sorted((r[name] for r in runs if "error" not in r[name]), key=lambda r: r["us"])
+        results[name] = ok[len(ok) // 2] if ok else runs[0][name]
+    return results
+
+
+def main():
+    results = median_of([run() for _ in range(RUNS)])
+    print(json.dumps({"platform": PLATFORM, "results": results}))
+    stored = load_baseline()
+    baseline = stored.get(PLATFORM, {})
+    if not baseline:
+        print("no baseline for", PLATFORM)
+    regressions = compare(results, baseline)
+    if SAVE_BASELINE:
+        stored[PLATFORM] = {k: v for k, v in results.items() if "error" not in v}
+        with open(_baseline_path, "w") as f:
+            f.write(json.dumps(stored))
+        print("baseline saved for", PLATFORM)
+    print("%d regression(s) beyond %d%%" % (regressions, round(TOLERANCE * 100)))
+    return regressions
+
+
+main()
@@ -0,0 +1,84 @@
+# display dirty bands
+# display_utils redraws and sends only the text lines that changed. This
+# keeps a copy of what the panel holds (every band show_rows() sends) and
+# checks it against a full redraw after each round of changes, including a
+# line that overlaps the button labels and a pause/resume of the screen,
+# and that update_display_lines() with nothing new skips the render.
+# Host only:  python "tests/display dirty bands.py"
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import sim
+sim.install(realtime=True)
+
+import system_state
+import display_utils
+from display_utils import lcd
+
+panel = bytearray(len(lcd.buffer))
+_show_rows = lcd.show_rows
+
+
+def show_rows(y0, y1):
+    row = lcd.width * 2
+    panel[y0 * row:y1 * row] = lcd.buffer[y0 * row:y1 * row]
+    return _show_rows(y0, y1)
+
+
+lcd.show_rows = show_rows
+
+ROUNDS = (
+    ("first frame", {0: "Lat: 51.2057613 N", 4: "GPS UTC: 10:15:30", 7: "NTRIP: OK"}),
+    ("nothing changed", {}),
+    ("time only", {4: "GPS UTC: 10:15:31"}),
+    ("two lines", {0: "Lat: 51.2057614 N", 9: "WP: 2 HOLD"}),
+    ("over the labels", {11: "overlapping line"}),
+    ("line cleared", {11: "", 9: ""}),
+)
+
+
+def full_frame():
+    # Also leaves the panel on a full redraw for the next round
+    display_utils.invalidate()
+    display_utils.update_display()
+    return bytes(lcd.buffer)
+
+
+def main():
+    failed = 0
+    for name, changes in ROUNDS:
+        for i, text in changes.items():
+            system_state.set_display_line(i, text)
+        before = display_utils.stats["bytes"]
+        display_utils.update_display()
+        sent = display_utils.stats["bytes"] - before
+        ok = bytes(panel) == full_frame()
+        print("%-16s %6d bytes  %s" % (name, sent, "ok" if ok else "FAIL"))
+        failed += not ok
+
+    display_utils.force_display()
+    display_utils.update_display()
+    ok = bytes(panel) == full_frame()
+    print("%-16s %6s        %s" % ("pause/resume", "", "ok" if ok else "FAIL"))
+    failed += not ok
+
+    # Lines formatted from state: a second pass with nothing new changes nothing
+    system_state.update_display_lines()
+    display_utils.update_display()
+    version = system_state.display_version
+    skipped = display_utils.stats["skipped"]
+    system_state.update_display_lines()
+    display_utils.update_display()
+    ok = system_state.display_version == version and display_utils.stats["skipped"] == skipped + 1
+    system_state.view.fix.utc += 1
+    system_state.update_display_lines()
+    ok = ok and system_state.display_versions[4] != 0 and system_state.display_version == version + 1
+    print("%-16s %6s        %s" % ("unchanged state", "", "ok" if ok else "FAIL"))
+    failed += not ok
+
+    print("PASS" if not failed else "%d round(s) wrong on the panel" % failed)
+    return failed
+
+
+main()
@@ -0,0 +1,99 @@
+# lcd byte order
+# The LCD driver keeps its framebuffer in the panel's byte order, so show()
+# sends it as is. This draws a screen through LCD_1inch3 and checks that the
+# bytes sent over SPI match what the old driver sent: the same drawing in
+# plain RGB565, byte-swapped in place just before the transfer.
+# Host only (it reads back what went over the sim SPI):
+#   python "tests/lcd byte order.py"
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import sim
+sim.install(realtime=True)
+
+import framebuf
+import vga2_8x16 as font
+from lcd import LCD_1inch3, WHITE, BLACK, RED
+
+BG = 0x8CBD      # force_display's background: bytes differ, so a missed swap shows
+INK = 0x1234
+
+W = H = 240
+
+
+def reference_text(fb, text, x, y, color, bg=None):
+    # The driver's draw_text before glyph blitting: one pixel() per set bit
+    bpr = (font.WIDTH + 7) // 8
+    cx = x
+    for ch in text:
+        if ch == "\n":
+            cx = x
+            y += font.HEIGHT + 1
+            continue
+        off = ord(ch) * font.HEIGHT * bpr
+        if bg is not None:
+            fb.fill_rect(cx, y, font.WIDTH, font.HEIGHT, bg)
+        for row in range(font.HEIGHT):
+            bits = 0
+            for b in range(bpr):
+                bits = (bits << 8) | font.FONT[off + row * bpr + b]
+            for col in range(font.WIDTH):
+                if bits & (1 << (bpr * 8 - 1 - col)):
+                    fb.pixel(cx + col, y + row, color)
+        cx += font.WIDTH + 1
+
+
+def scene(target, text):
+    # target: fill / fill_rect / text with plain RGB565 colours
+    target.fill(BG)
+    target.fill_rect(0, 190, 240, 50, WHITE)
+    target.fill_rect(-5, 100, 30, 300, RED)      # clipped at the edges
+    text("Lat: 51.2057613 N", 5, 0, BLACK, None)
+    text("WP: 3 HOLD\nRTK fixed", 5, 40, RED, None)
+    text("screen  logging", 30, 200, INK, WHITE)
+    text("edge", 225, 230, BLACK, None)           # runs off the bottom right
+    target.text("fb text", 10, 160, INK)
+
+
+def old_frame():
+    buf = bytearray(W * H * 2)
+    fb = framebuf.FrameBuffer(buf, W, H, framebuf.RGB565)
+    scene(fb, lambda s, x, y, c, bg: reference_text(fb, s, x, y, c, bg))
+    for i in range(0, len(buf), 2):               # the old show() loop
+        buf[i], buf[i + 1] = buf[i + 1], buf[i]
+    return bytes(buf)
+
+
+def new_frame(lcd):
+    scene(lcd, lambda s, x, y, c, bg: lcd.draw_text(font, s, x, y, c, bg))
+    lcd.show()
+    return bytes(lcd.spi.last_write)
+
+
+def main():
+    failed = 0
+    lcd = LCD_1inch3()
+    expected = old_frame()
+    sent = new_frame(lcd)
+    if sent != expected:
+        first = next(i for i in range(len(sent)) if sent[i] != expected[i])
+        px = first // 2
+        print("FAIL: first difference at x=%d y=%d" % (px % W, px // W))
+        failed += 1
+    else:
+        print("frame identical to the old driver (%d bytes)" % len(sent))
+
+    # The old show() swapped the buffer in place; a second show() must not change it
+    lcd.show()
+    if bytes(lcd.spi.last_write) != sent:
+        print("FAIL: buffer changed by show()")
+        failed += 1
+    else:
+        print("repeat show() sends the same bytes")
+
+    print("PASS" if not failed else "%d check(s) failed" % failed)
+    return failed
+
+
+main()
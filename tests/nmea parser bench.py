@@ -0,0 +1,187 @@
+# nmea parser bench
+# Compares the original string parser (decode + split per field, copied
+# below) against the single-pass gps_utils.parse_sentence on a 10 Hz
+# GGA+VTG stream. The digit decoders are viper on the Pico; on a host the
+# sim runs the same functions as plain Python, so only the Pico timing says
+# anything about the CPU budget.
+#
+# Recorded results, us per sentence (string parser -> parse_sentence), and
+# heap per 4 sentences:
+#   CPython 3.11, Linux, sim:  2.1-2.7 -> 7.3-9.5 us (0.26-0.30x),  1817 -> 672 B
+#       str.split/float() are C on CPython while the viper decoders run as
+#       plain Python here, so the host numbers favour the string parser.
+#   RP2040, MicroPython:       not recorded yet. Run
+#       mpremote run "tests/nmea parser bench.py"
+#       on a Pico and add its line here before relying on the CPU claim.
+# Runs on the Pico or on a host:  python "tests/nmea parser bench.py"
+import sys
+import time
+
+try:
+    import machine  # noqa: F401  (on the Pico)
+except ImportError:
+    # Host run: the sim package's stand-ins, on the host clock
+    import os
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+    import sim
+    sim.install(realtime=True)
+
+import gc
+import gps_utils
+from gps_fix import GpsFix
+
+if hasattr(time, "ticks_us"):
+    _now_us = time.ticks_us
+    _diff_us = time.ticks_diff
+else:
+    _now_us = lambda: int(time.perf_counter() * 1000000)
+    _diff_us = lambda a, b: a - b
+
+LINES = [
+    b"$GNGGA,101530.00,5112.3456789,N,00007.6543210,W,4,24,0.60,85.2,M,45.1,M,1.0,0000*46\r\n",
+    b"$GNVTG,123.45,T,,M,0.52,N,0.96,K,D*2F\r\n",
+    b"$GNGGA,101530.10,5112.3456800,N,00007.6543100,W,5,23,0.62,85.3,M,45.1,M,1.0,0000*4E\r\n",
+    b"$GNVTG,124.10,T,,M,0.50,N,0.93,K,D*2F\r\n",
+]
+ROUNDS = 500
+
+
+def run(fn, latest):
+    t0 = _now_us()
+    for _ in range(ROUNDS):
+        for line in LINES:
+            fn(line, latest)
+    dt = _diff_us(_now_us(), t0)
+    return dt, latest
+
+
+def heap_bytes(fn, latest):
+    # Heap allocated while parsing one pass of LINES
+    if hasattr(gc, "mem_alloc"):
+        gc.collect()
+        gc.disable()
+        a0 = gc.mem_alloc()
+        for line in LINES:
+            fn(line, latest)
+        used = gc.mem_alloc() - a0
+        gc.enable()
+        return used
+    import tracemalloc
+    tracemalloc.start()
+    for line in LINES:
+        fn(line, latest)
+    used = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return used
+
+
+# --- original gps_utils string parser, kept verbatim as the reference ---
+def parse_lat_lon(nmea):
+    try:
+        parts = nmea.split(',')
+        lat = float(parts[2])
+        lat_dir = parts[3]
+        lon = float(parts[4])
+        lon_dir = parts[5]
+
+        lat_deg = int(lat / 100)
+        lat_min = lat - lat_deg * 100
+        latitude = lat_deg + lat_min / 60
+        if lat_dir == 'S':
+            latitude = -latitude
+
+        lon_deg = int(lon / 100)
+        lon_min = lon - lon_deg * 100
+        longitude = lon_deg + lon_min / 60
+        if lon_dir == 'W':
+            longitude = -longitude
+
+        return latitude, longitude
+    except (IndexError, ValueError):
+        return None, None
+
+def extract_position(nmea):
+    if nmea.startswith('$GNGGA'):
+        lat, lon = parse_lat_lon(nmea)
+        if lat and lon:
+            return "Lat: {:.6f}".format(lat), "Lon: {:.6f}".format(lon)
+    return None, None
+
+def parse_fix_quality(nmea):
+    try:
+        fix = int(nmea.split(',')[6])
+        return {
+            0: "Fix: None",
+            1: "Fix: GPS",
+            2: "Fix: DGPS",
+            4: "Fix: RTK Fixed",
+            5: "Fix: RTK Float"
+        }.get(fix, f"Fix: {fix}")
+    except:
+        return "Fix: Unknown"
+
+def parse_heading(nmea):
+    try:
+        heading = float(nmea.split(',')[1])
+        return f"Head: {heading:.2f}°"
+    except:
+        return None
+
+def parse_time(nmea):
+    try:
+        raw_time = nmea.split(',')[1]
+        if len(raw_time) >= 6:
+            return f"{raw_time[0:2]}:{raw_time[2:4]}:{raw_time[4:6]} UTC"
+    except:
+        pass
+    return None
+
+def legacy(buffer, latest):
+    decoded = buffer.decode('ascii', 'ignore')
+    for sentence in decoded.replace('\n', '').split('$'):
+        if not sentence:
+            continue
+        nmea = '$' + sentence.strip()
+        if nmea.startswith('$GNGGA'):
+            lat_str, lon_str = extract_position(nmea)
+            if lat_str and lon_str:
+                latest['lat'] = lat_str
+                latest['lon'] = lon_str
+            latest['time'] = parse_time(nmea)
+            latest['fix'] = parse_fix_quality(nmea)
+            latest['last_update_ticks'] = time.ticks_ms()
+        elif nmea.startswith('$GNVTG'):
+            heading_str = parse_heading(nmea)
+            if heading_str:
+                latest['heading'] = heading_str
+# -------------------------------------------------------------------------
+
+
+def single_pass(line, fix):
+    gps_utils.parse_sentence(line, 0, len(line), fix)
+
+
+gps_utils.add_fix = lambda lat, lon, ts=None: None  # keep the track out of the timing
+
+t_old, out_old = run(legacy, {})
+t_new, fix = run(single_pass, GpsFix())
+run(legacy, {})  # warm caches before measuring the heap
+m_old = heap_bytes(legacy, {})
+m_new = heap_bytes(single_pass, GpsFix())
+out_old.pop("last_update_ticks", None)
+out_new = {"lat": fix.lat_text(), "lon": fix.lon_text(), "time": fix.time_text(),
+           "fix": fix.fix_text(), "heading": fix.heading_text()}
+
+n = ROUNDS * len(LINES)
+import nmea_utils
+print("decoders:       ", nmea_utils._dec_uint.__name__, nmea_utils._split_decimal.__name__)
+print("sentences:      ", n)
+print("string parser:  ", t_old, "us total,", t_old / n, "us/sentence")
+print("parse_sentence: ", t_new, "us total,", t_new / n, "us/sentence")
+print("speedup:         {:.2f}x".format(t_old / (t_new or 1)))
+print("heap per", len(LINES), "sentences: string parser", m_old, "B, parse_sentence", m_new, "B")
+print("same output:    ", out_old == out_new)
+print("bad checksums:  ", sum(c[1] for c in gps_utils.sentence_stats.values()))
+if out_old != out_new:
+    print(" string parser: ", out_old)
+    print(" parse_sentence:", out_new)
@@ -0,0 +1,57 @@
+# sim gst arrival
+# Waypoint arrival with a poor GST error estimate. The receiver reports a
+# 1-sigma error of 3 m per axis (about 4.2 m horizontal, over the 2 m
+# radius); the rover must still work round the mission rather than circle
+# the first waypoint. Also checks that the error estimate is dropped once
+# GST stops arriving.
+# Host only:  python "tests/sim gst arrival.py"
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from sim.world import World
+from sim.gnss import nmea
+
+SECONDS = 120
+MIN_WAYPOINTS = 3
+
+world = World()
+world.gnss.gst_sigma = 3.0
+
+import gps_utils
+from gps_fix import GpsFix
+
+
+def stale_gst_expires():
+    fix = GpsFix()
+    gga = nmea("GNGGA,101530.00,5112.0000000,N,00007.2000000,W,1,24,1.20,85.0,M,45.1,M,,0000")
+    gst = nmea("GNGST,101530.00,1.0,0.5,0.3,45.0,3.000,3.000,6.000")
+    gps_utils.process_buffer(gst, fix)
+    if fix.h_err() is None:
+        return False
+    for _ in range(gps_utils.GST_MAX_AGE):
+        gps_utils.process_buffer(gga, fix)
+    if fix.h_err() is None:
+        return False   # dropped too early
+    gps_utils.process_buffer(gga, fix)
+    return fix.h_err() is None
+
+
+def main():
+    failed = 0
+    ok = stale_gst_expires()
+    print("stale GST dropped after %d fixes: %s" % (gps_utils.GST_MAX_AGE, "ok" if ok else "FAIL"))
+    failed += not ok
+
+    report = world.run(SECONDS)
+    world.close()
+    ok = report["waypoints_reached"] >= MIN_WAYPOINTS
+    print("GST 3 m, radius 2 m: %d waypoints in %d s  %s"
+          % (report["waypoints_reached"], SECONDS, "ok" if ok else "FAIL"))
+    failed += not ok
+
+    print("PASS" if not failed else "%d check(s) failed" % failed)
+    return failed
+
+
+main()
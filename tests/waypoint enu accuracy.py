@@ -0,0 +1,80 @@
+# waypoint enu accuracy
+# Checks the flat east/north mission frame from waypoint_utils against
+# gps_utils.haversine_distance / calculate_bearing for the field sizes we
+# drive on, at a few latitudes. Points are spread across a square field
+# centred on the frame origin, the same way load_waypoints() places it.
+# Runs on the Pico or on a host:  python "tests/waypoint enu accuracy.py"
+import sys
+import time
+
+try:
+    import machine  # noqa: F401  (on the Pico)
+except ImportError:
+    # Host run: the sim package's stand-ins, on the host clock
+    import os
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+    import sim
+    sim.install(realtime=True)
+
+import math
+from gps_utils import haversine_distance, calculate_bearing
+from waypoint_utils import LocalFrame, distance_bearing
+
+LATITUDES = (0.0, 35.0, 51.2, 60.0)
+FIELDS_M = (50, 200, 1000, 3000)   # side of the square field
+GRID = 7                           # GRID x GRID points per field
+
+# Allowed error: distance relative to the leg length plus a fixed floor, and
+# bearing only checked on legs long enough for it to matter
+MAX_REL_DIST = 0.001
+DIST_FLOOR_M = 0.02
+MAX_BEARING_DEG = 0.1
+MIN_BEARING_LEG_M = 10
+
+
+def field_points(frame, side):
+    pts = []
+    for i in range(GRID):
+        for j in range(GRID):
+            e = (i / (GRID - 1) - 0.5) * side
+            n = (j / (GRID - 1) - 0.5) * side
+            lat, lon = frame.to_latlon(e, n)
+            pts.append((lat, lon, e, n))
+    return pts
+
+
+def check(lat0, side):
+    frame = LocalFrame(lat0, -0.1275)
+    pts = field_points(frame, side)
+    worst_d = 0.0
+    worst_rel = 0.0
+    worst_b = 0.0
+    for a in pts:
+        for b in pts:
+            ref_d = haversine_distance(a[0], a[1], b[0], b[1])
+            if ref_d == 0:
+                continue
+            d, brg = distance_bearing(a[2], a[3], b[2], b[3])
+            err = abs(d - ref_d)
+            worst_d = max(worst_d, err)
+            worst_rel = max(worst_rel, (err - DIST_FLOOR_M) / ref_d)
+            if ref_d >= MIN_BEARING_LEG_M:
+                ref_b = calculate_bearing(a[0], a[1], b[0], b[1])
+                worst_b = max(worst_b, abs((brg - ref_b + 540) % 360 - 180))
+    ok = worst_rel <= MAX_REL_DIST and worst_b <= MAX_BEARING_DEG
+    print("lat %5.1f field %5d m: max dist err %.3f m, max bearing err %.4f deg  %s"
+          % (lat0, side, worst_d, worst_b, "ok" if ok else "FAIL"))
+    return ok
+
+
+def main():
+    failed = 0
+    for lat0 in LATITUDES:
+        for side in FIELDS_M:
+            if not check(lat0, side):
+                failed += 1
+    print("PASS" if not failed else "%d case(s) out of tolerance" % failed)
+    return failed
+
+
+main()
@@ -0,0 +1,112 @@
+# web mission upload
+# POST /mission through web_server.handle_request with a stand-in socket:
+# heads split over several recv() calls, a head over 1 KB, one over the
+# limit, and a body that starts in the same recv as the end of the head.
+# The stored mission must hold exactly the waypoints that were sent.
+# Host only:  python "tests/web mission upload.py"
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import sim
+sim.install(realtime=True)
+os.chdir(tempfile.mkdtemp(prefix="rover-upload-"))
+
+import system_state
+import web_server
+import waypoint_utils
+
+CSV = b"51.2000000,-0.1200000\n51.2003000,-0.1200000,3\n51.2003000,-0.1195000,2,1.5,4\n"
+
+
+class Conn:
+    """Socket stand-in: recv() hands out the request in the given pieces."""
+    def __init__(self, data, sizes):
+        self.pieces = []
+        i = 0
+        for n in sizes:
+            self.pieces.append(data[i:i + n])
+            i += n
+        if i < len(data):
+            self.pieces.append(data[i:])
+        self.sent = b""
+
+    def recv(self, n):
+        if not self.pieces:
+            return b""
+        p = self.pieces[0]
+        self.pieces[0] = p[n:]
+        if not self.pieces[0]:
+            self.pieces.pop(0)
+        return p[:n]
+
+    def send(self, data):
+        self.sent += data.encode() if isinstance(data, str) else data
+        return len(data)
+
+    sendall = send
+
+    def status(self):
+        return self.sent.split(b"\r\n", 1)[0].decode()
+
+
+def request(body, extra_header=b""):
+    return (b"POST /mission HTTP/1.1\r\nHost: rover\r\n" + extra_header
+            + b"Content-Length: %d\r\n\r\n" % len(body) + body)
+
+
+def stored():
+    m = waypoint_utils.load_waypoints()
+    return [(m.latlon(i), m.radius_m(i), m.speed_ms(i), m.hold_ms(i)) for i in range(m.count)]
+
+
+def expected():
+    f = open("expected.csv", "wb")
+    f.write(CSV)
+    f.close()
+    m = waypoint_utils.load_mission("expected.csv")
+    os.remove("expected.csv")
+    return [(m.latlon(i), m.radius_m(i), m.speed_ms(i), m.hold_ms(i)) for i in range(m.count)]
+
+
+def upload(name, data, sizes, want_status):
+    for f in (waypoint_utils.MISSION_CSV, waypoint_utils.MISSION_BIN):
+        try:
+            os.remove(f)
+        except OSError:
+            pass
+    system_state.mission_request = None
+    conn = Conn(data, sizes)
+    web_server.handle_request(conn)
+    ok = conn.status().split(" ", 1)[1].startswith(want_status)
+    if ok and want_status == "200":
+        ok = stored() == expected() and system_state.mission_request is not None
+    if ok and want_status != "200":
+        ok = system_state.mission_request is None
+    print("%-34s %-40s %s" % (name, conn.status(), "ok" if ok else "FAIL"))
+    return ok
+
+
+def main():
+    long_agent = b"User-Agent: " + b"x" * 1100 + b"\r\n"
+    huge = b"Cookie: " + b"y" * 2100 + b"\r\n"
+    data = request(CSV)
+    head_len = data.find(b"\r\n\r\n") + 4
+    cases = (
+        ("one recv", data, [], "200"),
+        ("head in 5-byte pieces", data, [5] * (head_len // 5 + 1), "200"),
+        ("head ends mid recv", data, [head_len - 2, 30], "200"),
+        ("head over 1 KB", request(CSV, long_agent), [], "200"),
+        ("length in first 1 KB, head beyond", request(CSV, long_agent), [1024], "200"),
+        ("head over the limit", request(CSV, huge), [], "431"),
+        ("body cut short", request(CSV)[:-10], [], "400"),
+    )
+    failed = 0
+    for name, d, sizes, want in cases:
+        failed += not upload(name, d, sizes, want)
+    print("PASS" if not failed else "%d case(s) failed" % failed)
+    return failed
+
+
+main()
@@ -0,0 +1,157 @@
+# track_store.py
+# Fixed-capacity breadcrumb track in parallel typed arrays.
+# Each point costs BYTES_PER_POINT bytes (float32 lat, float32 lon, uint32
+# time) and appending never allocates. Once full, either the oldest point is
+# overwritten or, with simplify=True, the track is thinned Visvalingam-style
+# (least significant corners first) so it keeps covering the whole mission.
+from array import array
+import math
+
+BYTES_PER_POINT = 12
+
+
+_AREA_BINS = 64
+
+
+class TrackStore:
+    def __init__(self, capacity, simplify=False):
+        self.capacity = capacity
+        self.simplify_when_full = simplify
+        self.lat = array('f', bytes(4 * capacity))
+        self.lon = array('f', bytes(4 * capacity))
+        self.t = array('I', bytes(4 * capacity))
+        self.start = 0   # index of the oldest point
+        self.count = 0
+        self.seq = 0     # total points ever appended
+        self.generation = 0  # bumped whenever stored points are removed or overwritten
+        self._bins = array('H', bytes(2 * _AREA_BINS))
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.start = 0
+        self.count = 0
+        self.generation += 1
+
+    def append(self, lat, lon, ts):
+        cap = self.capacity
+        if self.count == cap and self.simplify_when_full and cap >= 8:
+            self.simplify(cap * 3 // 4)
+        if self.count < cap:
+            i = (self.start + self.count) % cap
+            self.count += 1
+        else:
+            # Overwrite the oldest point: clients holding it must reload
+            i = self.start
+            self.start = (i + 1) % cap
+            self.generation += 1
+        self.lat[i] = lat
+        self.lon[i] = lon
+        self.t[i] = ts
+        self.seq += 1
+
+    def index(self, k):
+        """Array index of the k-th oldest point."""
+        return (self.start + k) % self.capacity
+
+    def last(self):
+        """(lat, lon, t) of the newest point, or None."""
+        if not self.count:
+            return None
+        i = self.index(self.count - 1)
+        return self.lat[i], self.lon[i], self.t[i]
+
+    def first_seq(self):
+        """seq number of the oldest point still held."""
+        return self.seq - self.count
+
+    def coords(self, first=0):
+        """[[lon, lat], ...] from the first-th oldest point (GeoJSON order)."""
+        lat = self.lat
+        lon = self.lon
+        out = []
+        for k in range(first, self.count):
+            i = self.index(k)
+            out.append([lon[i], lat[i]])
+        return out
+
+    def _area_bin(self, i0, i1, i2, kx):
+        # log2 bucket of the triangle area at point i1 (degrees^2, lon scaled)
+        lat = self.lat
+        lon = self.lon
+        ax = (lon[i0] - lon[i1]) * kx
+        ay = lat[i0] - lat[i1]
+        bx = (lon[i2] - lon[i1]) * kx
+        by = lat[i2] - lat[i1]
+        area = abs(ax * by - ay * bx)
+        if area == 0:
+            return 0
+        b = math.frexp(area)[1] + 90
+        if b < 1:
+            return 1
+        if b >= _AREA_BINS:
+            return _AREA_BINS - 1
+        return b
+
+    def simplify(self, keep):
+        """
+        Thin the track to at most keep points by dropping the points whose
+        triangle with their neighbours has the smallest area. The first and
+        last points always stay. Works in place, in passes that never drop
+        two neighbours at once.
+        """
+        lat = self.lat
+        lon = self.lon
+        t = self.t
+        bins = self._bins
+        removed_any = False
+        while self.count > keep and self.count > 2:
+            n = self.count
+            kx = math.cos(math.radians(lat[self.index(n // 2)]))
+            for b in range(_AREA_BINS):
+                bins[b] = 0
+            for k in range(1, n - 1):
+                bins[self._area_bin(self.index(k - 1), self.index(k), self.index(k + 1), kx)] += 1
+            # area bucket below which points go, and how many may go from it
+            need = n - keep
+            limit = 0
+            acc = 0
+            while limit < _AREA_BINS and acc + bins[limit] < need:
+                acc += bins[limit]
+                limit += 1
+            quota = need - acc
+            j = 1
+            prev_removed = False
+            for k in range(1, n - 1):
+                i = self.index(k)
+                drop = False
+                if not prev_removed and need > 0:
+                    b = self._area_bin(self.index(k - 1), i, self.index(k + 1), kx)
+                    if b < limit:
+                        drop = True
+                    elif b == limit and quota > 0:
+                        quota -= 1
+                        drop = True
+                if drop:
+                    need -= 1
+                    prev_removed = True
+                    continue
+                prev_removed = False
+                w = self.index(j)
+                if w != i:
+                    lat[w] = lat[i]
+                    lon[w] = lon[i]
+                    t[w] = t[i]
+                j += 1
+            i = self.index(n - 1)
+            w = self.index(j)
+            lat[w] = lat[i]
+            lon[w] = lon[i]
+            t[w] = t[i]
+            if j + 1 == n:
+                break
+            self.count = j + 1
+            removed_any = True
+        if removed_any:
+            self.generation += 1
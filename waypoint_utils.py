@@ -1,17 +1,209 @@
 # waypoint_utils.py
-def load_waypoints(filename="waypoints.csv"):
-    waypoints = []
+#
+# Mission files, either of:
+#   waypoints.csv   one waypoint per line: lat,lon[,radius_m[,speed_ms[,hold_s]]]
+#                   (missing or empty fields take the defaults, # starts a comment)
+#   mission.bin     MISSION_MAGIC then one 14-byte record per waypoint:
+#                   <iiHHH  lat, lon (1e-7 deg), radius (cm), speed (cm/s), hold (0.1 s)
+# Both are read a line / a block at a time, never whole.
+import math
+import os
+import struct
+from array import array
+
+EARTH_R = 6371000  # metres, same sphere as gps_utils.haversine_distance
+
+MISSION_CSV = "waypoints.csv"
+MISSION_BIN = "mission.bin"
+MISSION_MAGIC = b"RWP1"
+_REC = "<iiHHH"
+_REC_SIZE = 14
+_BLOCK = 32          # records per read when streaming mission.bin
+
+DEFAULT_RADIUS = 2.0  # metres
+DEFAULT_SPEED = 0.0   # m/s, 0 = no speed set for this leg
+DEFAULT_HOLD = 0.0    # seconds to wait at the waypoint before moving on
+ORIGIN_GRID = 1024    # frame origins are whole multiples of 1/ORIGIN_GRID degree
+
+
+class LocalFrame:
+    """
+    Flat east/north frame (metres) around a fixed origin. Valid for the few
+    kilometres a mission covers; cos(lat) of the origin is worked out once,
+    so projecting a fix is two subtractions and two multiplies.
+    """
+    __slots__ = ("lat0", "lon0", "cos_lat0", "kx", "ky")
+
+    def __init__(self, lat0, lon0):
+        self.lat0 = lat0
+        self.lon0 = lon0
+        self.cos_lat0 = math.cos(math.radians(lat0))
+        self.ky = EARTH_R * math.pi / 180       # metres per degree of latitude
+        self.kx = self.ky * self.cos_lat0       # metres per degree of longitude here
+
+    def to_enu(self, lat, lon):
+        return (lon - self.lon0) * self.kx, (lat - self.lat0) * self.ky
+
+    def to_latlon(self, east, north):
+        return self.lat0 + north / self.ky, self.lon0 + east / self.kx
+
+
+def distance_bearing(e1, n1, e2, n2):
+    """Planar distance (m) and bearing (deg, 0 = north) from point 1 to 2."""
+    de = e2 - e1
+    dn = n2 - n1
+    return math.sqrt(de * de + dn * dn), math.degrees(math.atan2(de, dn)) % 360
+
+
+class Mission:
+    """
+    Waypoints in parallel arrays (22 bytes each) in the same units as the
+    binary records, plus east/north in `frame` once finish() has run.
+    A Mission is never modified after finish(); reloading builds a new one.
+    """
+    __slots__ = ("count", "lat", "lon", "radius", "speed", "hold", "east", "north", "frame")
+
+    def __init__(self):
+        self.count = 0
+        self.lat = array('i')       # 1e-7 deg
+        self.lon = array('i')
+        self.radius = array('H')    # cm
+        self.speed = array('H')     # cm/s
+        self.hold = array('H')      # 0.1 s
+        self.east = array('f')      # metres in frame
+        self.north = array('f')
+        self.frame = None
+
+    def __len__(self):
+        return self.count
+
+    def add_raw(self, lat_e7, lon_e7, radius_cm, speed_cms, hold_ds):
+        self.lat.append(lat_e7)
+        self.lon.append(lon_e7)
+        self.radius.append(radius_cm)
+        self.speed.append(speed_cms)
+        self.hold.append(hold_ds)
+        self.count += 1
+
+    def add(self, lat, lon, radius=DEFAULT_RADIUS, speed=DEFAULT_SPEED, hold=DEFAULT_HOLD):
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise ValueError("position out of range")
+        self.add_raw(round(lat * 1e7), round(lon * 1e7), _u16(radius * 100),
+                     _u16(speed * 100), _u16(hold * 10))
+
+    def finish(self):
+        """Set up the frame around the middle of the mission and project it."""
+        if not self.count:
+            return self
+        # The origin sits on a 1/ORIGIN_GRID degree grid (about 100 m), so it
+        # is exact as a float32 on rp2: fixes projected by to_enu() and the
+        # waypoints projected here from their integers share one origin, with
+        # no offset between them. The waypoint offsets are worked out in
+        # integers (1e-7 deg * ORIGIN_GRID) before the one float multiply.
+        g = ORIGIN_GRID
+        lat0_g = ((min(self.lat) + max(self.lat)) * g + 10 ** 7) // (2 * 10 ** 7)
+        lon0_g = ((min(self.lon) + max(self.lon)) * g + 10 ** 7) // (2 * 10 ** 7)
+        frame = LocalFrame(lat0_g / g, lon0_g / g)
+        kx = frame.kx / (1e7 * g)
+        ky = frame.ky / (1e7 * g)
+        lat0 = lat0_g * 10 ** 7
+        lon0 = lon0_g * 10 ** 7
+        for i in range(self.count):
+            self.east.append((self.lon[i] * g - lon0) * kx)
+            self.north.append((self.lat[i] * g - lat0) * ky)
+        self.frame = frame
+        return self
+
+    def latlon(self, i):
+        return self.lat[i] / 1e7, self.lon[i] / 1e7
+
+    def radius_m(self, i):
+        return self.radius[i] / 100
+
+    def speed_ms(self, i):
+        return self.speed[i] / 100
+
+    def hold_ms(self, i):
+        return self.hold[i] * 100
+
+    def save_bin(self, filename):
+        with open(filename, "wb") as f:
+            f.write(MISSION_MAGIC)
+            rec = bytearray(_REC_SIZE)
+            for i in range(self.count):
+                struct.pack_into(_REC, rec, 0, self.lat[i], self.lon[i],
+                                 self.radius[i], self.speed[i], self.hold[i])
+                f.write(rec)
+
+
+def _u16(x):
+    x = round(x)
+    if not 0 <= x <= 0xFFFF:
+        raise ValueError("parameter out of range")
+    return x
+
+
+def _field(parts, i, default):
+    if i < len(parts) and parts[i].strip():
+        return float(parts[i])
+    return default
+
+
+def _read_csv(f, mission):
+    for line in f:
+        line = line.split("#", 1)[0].strip()
+        if "," not in line:
+            continue
+        parts = line.split(",")
+        try:
+            mission.add(float(parts[0]), float(parts[1]),
+                        _field(parts, 2, DEFAULT_RADIUS),
+                        _field(parts, 3, DEFAULT_SPEED),
+                        _field(parts, 4, DEFAULT_HOLD))
+        except ValueError:
+            print("Invalid waypoint:", line)
+
+
+def _read_bin(f, mission):
+    buf = bytearray(_REC_SIZE * _BLOCK)
+    mv = memoryview(buf)
+    while True:
+        n = f.readinto(buf)
+        if not n:
+            break
+        if n % _REC_SIZE:
+            raise ValueError("truncated mission record")
+        for off in range(0, n, _REC_SIZE):
+            mission.add_raw(*struct.unpack_from(_REC, mv, off))
+
+
+def is_binary_mission(filename):
+    """True if the file starts with MISSION_MAGIC (mission.bin format)."""
+    with open(filename, "rb") as f:
+        return f.read(len(MISSION_MAGIC)) == MISSION_MAGIC
+
+
+def load_mission(filename):
+    """Mission from a CSV or binary mission file (told apart by MISSION_MAGIC)."""
+    mission = Mission()
+    with open(filename, "rb") as f:
+        if f.read(len(MISSION_MAGIC)) == MISSION_MAGIC:
+            _read_bin(f, mission)
+            return mission.finish()
+    with open(filename, "r") as f:
+        _read_csv(f, mission)
+    return mission.finish()
+
+
+def load_waypoints(filename=None):
+    """
+    The mission to run at boot: mission.bin if present, else waypoints.csv.
+    An unreadable file gives an empty Mission.
+    """
+    if filename is None:
+        filename = MISSION_BIN if MISSION_BIN in os.listdir() else MISSION_CSV
     try:
-        with open(filename, "r") as f:
-            for line in f:
-                if "," in line:
-                    parts = line.strip().split(",")
-                    try:
-                        lat = float(parts[0])
-                        lon = float(parts[1])
-                        waypoints.append((lat, lon))
-                    except ValueError:
-                        print("Invalid waypoint:", line)
+        return load_mission(filename)
     except Exception as e:
         print("Error loading waypoints:", e)
-    return waypoints
+        return Mission()
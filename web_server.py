@@ -5,6 +5,8 @@ import time
 
 # NEW: pull in your GPS helpers you said you added
 import gps_utils  # expects: current_fix(), as_geojson(), (optionally add_fix)
+import metrics
+import waypoint_utils
 
 # --- HTML: status+map page ----------------------------------------------------
 HTML_INDEX = """<!doctype html>
@@ -52,6 +54,12 @@ HTML_INDEX = """<!doctype html>
       <button id="clearLog" type="button">Clear</button>
     </label>
 
+    <label class="box" style="display:flex;gap:6px;align-items:center">
+      <span>Mission:</span>
+      <input id="missionFile" type="file" accept=".csv,.bin" />
+      <code id="missionMsg">–</code>
+    </label>
+
     <form action="/steering" method="get">
       <button name="state" value="on">Enable Steering</button>
       <button name="state" value="off">Disable Steering</button>
@@ -97,6 +105,9 @@ HTML_INDEX = """<!doctype html>
   L.control.layers(baseLayers, overlays, { collapsed: true }).addTo(map);
 
   let initialized = false;
+  let trackSeq = 0;   // cursor for /track.json?since=&gen=
+  let trackGen = -1;
+  let trackPts = [];
 
   function downsampleLatLngs(latlngs, maxLen=2000) {
     const n = latlngs.length;
@@ -179,10 +190,25 @@ HTML_INDEX = """<!doctype html>
   });
   document.getElementById("clearLog").addEventListener("click", clearCsvTrack);
 
+  // Mission upload: the rover swaps to it at its next control tick
+  document.getElementById("missionFile").addEventListener("change", async (e) => {
+    const file = e.target.files[0];
+    if (!file) return;
+    const msg = document.getElementById("missionMsg");
+    msg.textContent = "uploading…";
+    try {
+      const r = await fetch("/mission", { method: "POST", body: file }).then(r => r.json());
+      msg.textContent = r.ok ? (r.waypoints + " waypoints") : ("error: " + r.error);
+    } catch (err) {
+      msg.textContent = "upload failed";
+    }
+    e.target.value = "";
+  });
+
   async function refresh() {
     try {
       const s = await fetch("/status.json", { cache: "no-store" }).then(r => r.json());
-      const t = await fetch("/track.json",  { cache: "no-store" }).then(r => r.json());
+      const t = await fetch("/track.json?since=" + trackSeq + "&gen=" + trackGen, { cache: "no-store" }).then(r => r.json());
 
       if (s) {
         document.getElementById("gps_time").textContent = s.extra && s.extra.time || "–";
@@ -216,22 +242,24 @@ HTML_INDEX = """<!doctype html>
         populateLogListFromStatus(s.extra);
       }
 
-      // Track drawing
-      crumbLayer.clearLayers();
+      // Track drawing: keep the points locally and only fetch new ones
       if (t && t.features) {
-        let line = [];
+        let added = [];
         for (const f of t.features) {
           if (f.geometry.type === "LineString") {
-            line = f.geometry.coordinates.map(([lng, lat]) => [lat, lng]);
-          } else if (f.geometry.type === "MultiPoint") {
-            const pts = f.geometry.coordinates.map(([lng, lat]) => [lat, lng]);
-            const step = Math.max(1, Math.floor(pts.length / 100));
-            for (let i = 0; i < pts.length; i += step) {
-              L.circleMarker(pts[i], { radius: 3 }).addTo(crumbLayer);
-            }
+            added = f.geometry.coordinates.map(([lng, lat]) => [lat, lng]);
           }
         }
-        trackLine.setLatLngs(line);
+        trackPts = t.since ? trackPts.concat(added) : added;
+        trackSeq = t.seq || 0;
+        trackGen = (t.gen != null) ? t.gen : -1;
+        trackLine.setLatLngs(trackPts);
+
+        crumbLayer.clearLayers();
+        const step = Math.max(1, Math.floor(trackPts.length / 100));
+        for (let i = 0; i < trackPts.length; i += step) {
+          L.circleMarker(trackPts[i], { radius: 3 }).addTo(crumbLayer);
+        }
       }
     } catch (e) {
       console && console.warn && console.warn("refresh error", e);
@@ -248,52 +276,102 @@ should_exit = False  # Shared exit flag
 shutdown_requested = False
 
 
-def start_file_server(ip="0.0.0.0", port=80):
-    global should_exit, shutdown_requested
+_server = None
+
+def open_server(ip="0.0.0.0", port=80):
+    """Listen without blocking; requests are then served by poll_server()."""
+    global _server
     s = socket.socket()
+    s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
     s.bind((ip, port))
-    s.listen(1)
+    s.listen(2)
+    s.setblocking(False)
+    _server = s
     print(f"Web server started at http://{ip}:{port}")
-    
-    while not should_exit:
+
+def poll_server():
+    """Serve at most one waiting request. Returns at once if none is waiting."""
+    if _server is None or should_exit:
+        return
+    try:
+        conn, addr = _server.accept()
+    except OSError:
+        return
+    try:
+        conn.settimeout(2.0)
+        handle_request(conn)
+    except Exception as e:
+        print("Web server error:", e)
+    finally:
+        conn.close()
+
+MAX_HEAD_BYTES = 2048
+
+def read_head(conn):
+    """
+    (request head as text, start of the body) once the blank line after the
+    headers has arrived, however many recv() calls that takes. A client that
+    stops early gets what it sent, with no body. Returns None if nothing
+    came, or after answering 431 if the head outgrows MAX_HEAD_BYTES.
+    """
+    raw = b""
+    while True:
         try:
-            conn, addr = s.accept()
-            request = conn.recv(1024).decode("utf-8")
-
-            # ---- Steering control: handle and short-circuit to home page ----
-            if request.startswith("GET /steering"):
-                if "state=off" in request:
-                    system_state.steering_enabled = False
-                elif "state=on" in request:
-                    system_state.steering_enabled = True
-                # Re-serve the updated index instead of trying to serve a file
-                serve_index(conn)
-                continue
-            # -----------------------------------------------------------------
-
-            # lightweight JSON endpoints before file parsing
-            if request.startswith("GET /status.json"):
-                serve_status_json(conn)
-                continue
-            if request.startswith("GET /track.json"):
-                serve_track_json(conn)
-                continue
-
-            requested_file = parse_filename_from_request(request)
-            if requested_file == "shutdown":
-                shutdown_requested = True
-                serve_shutdown_page(conn)
-            elif requested_file:
-                serve_file(conn, requested_file)
-            else:
-                serve_index(conn)
-
-        except Exception as e:
-            print("Web server error:", e)
-        finally:
-            conn.close()
-    print("Web server stopped.")
-    s.close()
+            chunk = conn.recv(512)
+        except OSError:
+            chunk = b""
+        if not chunk:
+            return (raw.decode("utf-8"), b"") if raw else None
+        raw += chunk
+        head_end = raw.find(b"\r\n\r\n")
+        if 0 <= head_end <= MAX_HEAD_BYTES:
+            return raw[:head_end].decode("utf-8"), raw[head_end + 4:]
+        if len(raw) > MAX_HEAD_BYTES:
+            conn.send("HTTP/1.0 431 Request Header Fields Too Large\r\n\r\n")
+            return None
+
+def handle_request(conn):
+    global shutdown_requested
+    # Only the head is text; whatever follows it is the start of a body
+    head = read_head(conn)
+    if head is None:
+        return
+    request, body = head
+
+    if request.startswith("POST /mission"):
+        serve_mission_upload(conn, request, body)
+        return
+
+    # ---- Steering control: handle and short-circuit to home page ----
+    if request.startswith("GET /steering"):
+        if "state=off" in request:
+            system_state.steering_enabled = False
+        elif "state=on" in request:
+            system_state.steering_enabled = True
+        # Re-serve the updated index instead of trying to serve a file
+        serve_index(conn)
+        return
+    # -----------------------------------------------------------------
+
+    # lightweight JSON endpoints before file parsing
+    if request.startswith("GET /status.json"):
+        serve_status_json(conn)
+        return
+    if request.startswith("GET /track.json"):
+        serve_track_json(conn, request)
+        return
+    if request.startswith("GET /metrics"):
+        serve_metrics(conn, request)
+        return
+
+    requested_file = parse_filename_from_request(request)
+    if requested_file == "shutdown":
+        shutdown_requested = True
+        serve_shutdown_page(conn)
+    elif requested_file:
+        serve_file(conn, requested_file)
+    else:
+        serve_index(conn)
     
 def parse_filename_from_request(request):
     try:
@@ -324,12 +402,11 @@ def serve_status_json(conn):
     ts  = fix.get("t", None)
 
     # Enrich with your existing system_state info so the top bar can update
-    gps = system_state.gps_data
-    lat_str = strip_prefix(gps.get('lat', ''), 'Lat: ')
-    lon_str = strip_prefix(gps.get('lon', ''), 'Lon: ')
-    fix_str = strip_prefix(gps.get('fix', ''), 'Fix: ')
-    heading = strip_prefix(gps.get('heading', ''), 'Head: ')
-    ticks = gps.get('last_update_ticks', None)
+    gps = system_state.view.fix
+    nav = system_state.view.nav
+    fix_str = gps.fix_name()
+    heading = "" if gps.heading is None else f"{gps.heading:.2f}°"
+    ticks = gps.last_update_ticks
     dt = time.ticks_diff(time.ticks_ms(), ticks) if ticks else '---'
     files = [f for f in os.listdir() if f.endswith(".csv")]
 
@@ -338,28 +415,137 @@ def serve_status_json(conn):
         "lon": lon,
         "t": ts,
         "extra": {
-            "time": gps.get('time', ''),
+            "time": gps.time_text(),
             "fix": fix_str,
             "heading": heading,
             "dt": dt,
             "logging": 'Yes' if system_state.logging else 'No',
             "steering": 'Enabled' if system_state.steering_enabled else 'Disabled',
-            "wp": system_state.current_waypoint_index,
-            "herr": f"{system_state.nav_heading_error:.2f}°",
+            "wp": nav.wp_index,
+            "herr": f"{nav.heading_error:.2f}°",
+            "xte": nav.cross_track,
+            "wp_count": system_state.wp_count,
+            "holding": nav.holding,
+            "target_speed": nav.target_speed,
+            "h_err": gps.h_err(),
+            "hdop": gps.hdop,
+            "nmea": gps_utils.sentence_stats,
+            "nmea_bytes_dropped": gps_utils.bytes_dropped,
+            "tasks": system_state.scheduler.stats() if system_state.scheduler else None,
+            "rt_tasks": system_state.rt_scheduler.stats() if system_state.rt_scheduler else None,
+            "snapshot_retries": system_state.shared.retries,
+            "display": system_state.display_stats,
+            "rc_failsafe": system_state.rc_failsafe,
+            "ntrip": system_state.ntrip.status() if system_state.ntrip else None,
+            "rtcm": system_state.rtcm.stats() if system_state.rtcm else None,
+            "gps_ring": {
+                "irq": gps_utils.ingest_irq,
+                "received": gps_utils.gps_ring.received,
+                "rxbuf_full": gps_utils.rxbuf_full,
+                "size": gps_utils.gps_ring.size,
+                "high_water": gps_utils.gps_ring.high_water,
+                "overflows": gps_utils.gps_ring.overflows,
+                "dropped": gps_utils.gps_ring.dropped,
+            },
             "files": files,
         }
     }
     send_json(conn, payload)
 
-def serve_track_json(conn):
-    # GeoJSON from gps_utils.as_geojson()
+def query_int(request, name, default=0):
+    """Integer query parameter from the request line, e.g. ?since=42."""
     try:
-        payload = gps_utils.as_geojson()
+        path = request.split(" ", 2)[1]
+        if "?" not in path:
+            return default
+        for pair in path.split("?", 1)[1].split("&"):
+            k, _, v = pair.partition("=")
+            if k == name:
+                return int(v)
+    except (IndexError, ValueError):
+        pass
+    return default
+
+def serve_track_json(conn, request):
+    # GeoJSON from gps_utils.track_json(); ?since=<seq>&gen=<gen> returns only new points
+    try:
+        body = gps_utils.track_json(query_int(request, "since"), query_int(request, "gen", -1))
     except Exception as e:
         # Fall back to empty feature collection on any error
-        print("as_geojson error:", e)
-        payload = {"type": "FeatureCollection", "features": []}
-    send_json(conn, payload)
+        print("track_json error:", e)
+        body = b'{"type":"FeatureCollection","features":[]}'
+    conn.sendall("HTTP/1.0 200 OK\r\nContent-Type: application/json\r\nCache-Control: no-cache\r\n\r\n")
+    conn.sendall(body)
+
+def serve_metrics(conn, request):
+    # Per-stage loop timing; ?format=prom for Prometheus text, ?reset=1 to
+    # clear the counters after this read
+    if "format=prom" in request:
+        conn.sendall("HTTP/1.0 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\n\r\n")
+        conn.sendall(metrics.as_prometheus())
+    else:
+        send_json(conn, metrics.as_dict())
+    if query_int(request, "reset"):
+        metrics.reset()
+
+MISSION_TMP = "mission.tmp"
+MAX_MISSION_BYTES = 256 * 1024
+
+def header_int(request, name, default=0):
+    """Integer header value, name in lower case, e.g. content-length."""
+    for line in request.split("\r\n")[1:]:
+        k, _, v = line.partition(":")
+        if k.strip().lower() == name:
+            try:
+                return int(v)
+            except ValueError:
+                break
+    return default
+
+def serve_mission_upload(conn, request, body):
+    # POST /mission with a waypoints.csv or mission.bin as the body. The file
+    # is streamed to flash and parsed from there; only a mission that loads
+    # cleanly replaces the stored one and is handed to the control core.
+    length = header_int(request, "content-length")
+    if not 0 < length <= MAX_MISSION_BYTES:
+        send_json(conn, {"ok": False, "error": "bad content-length"}, "400 Bad Request")
+        return
+    try:
+        with open(MISSION_TMP, "wb") as f:
+            f.write(body)
+            got = len(body)
+            while got < length:
+                chunk = conn.recv(min(1024, length - got))
+                if not chunk:
+                    raise OSError("upload cut short")
+                f.write(chunk)
+                got += len(chunk)
+        # Format from the stored file: the first recv may end before the magic
+        binary = waypoint_utils.is_binary_mission(MISSION_TMP)
+        mission = waypoint_utils.load_mission(MISSION_TMP)
+        if not mission.count:
+            raise ValueError("no waypoints")
+    except Exception as e:
+        print("Mission upload failed:", e)
+        try:
+            os.remove(MISSION_TMP)
+        except OSError:
+            pass
+        send_json(conn, {"ok": False, "error": str(e)}, "400 Bad Request")
+        return
+
+    # Keep it for the next boot: rename straight over the old file, so a reset
+    # at any point leaves a mission to boot, then drop the other format
+    keep, other = waypoint_utils.MISSION_BIN, waypoint_utils.MISSION_CSV
+    if not binary:
+        keep, other = other, keep
+    os.rename(MISSION_TMP, keep)
+    try:
+        os.remove(other)
+    except OSError:
+        pass
+    system_state.mission_request = mission
+    send_json(conn, {"ok": True, "waypoints": mission.count, "file": keep})
 
 def serve_file(conn, filename):
     if filename not in os.listdir():
@@ -382,17 +568,21 @@ def check_shutdown():
     return shutdown_requested
 
 def stop():
-    global should_exit
+    global should_exit, _server
     should_exit = True
+    if _server is not None:
+        _server.close()
+        _server = None
+    print("Web server stopped.")
 
 # --- tiny response helpers ----------------------------------------------------
-def send_json(conn, obj):
+def send_json(conn, obj, status="200 OK"):
     try:
         import ujson as json
     except:
         import json
     body = json.dumps(obj)
-    conn.sendall("HTTP/1.0 200 OK\r\nContent-Type: application/json\r\nCache-Control: no-cache\r\n\r\n")
+    conn.sendall("HTTP/1.0 " + status + "\r\nContent-Type: application/json\r\nCache-Control: no-cache\r\n\r\n")
     conn.sendall(body)
 
 def send_html(conn, html):